@@ -5,10 +5,13 @@ A SublimeText 3 plugin for reviewing todo (and other) comments within your code.
 @author Jonathan Delgado (Initial Repo by @robcowie and ST3 update by @dnatag)
 '''
 
+import collections
 import datetime
 import fnmatch
+import hashlib
 import io
 import itertools
+import json
 import os
 import re
 import sublime
@@ -17,6 +20,125 @@ import sys
 import threading
 import timeit
 
+try:
+	from concurrent import futures
+except ImportError:
+	futures = None
+
+try:
+	from re import _parser as sre_parse
+except ImportError:
+	import sre_parse
+
+def prefilter(pattern, flags, encoding):
+	sample = ''.join(chr(c) for c in range(32, 127)) + '\n'
+	try:
+		if sample.encode(encoding) != sample.encode('ascii'):
+			return None
+	except(LookupError, UnicodeError):
+		return None
+	parsed = sre_parse.parse(pattern, flags)
+	state = getattr(parsed, 'state', None) or parsed.pattern
+	case = bool(state.flags & re.IGNORECASE)
+	options = literals(parsed, case)
+	if not options:
+		return re.compile(b'')
+	options = [re.escape(o.encode('ascii')) for o in options]
+	return re.compile(b'|'.join(options), re.IGNORECASE if case else 0)
+
+def literals(seq, case):
+	repeats = [sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT]
+	if hasattr(sre_parse, 'POSSESSIVE_REPEAT'):
+		repeats.append(sre_parse.POSSESSIVE_REPEAT)
+	options = []
+	run = []
+	for op, av in seq:
+		if op == sre_parse.LITERAL and av < 128 and chr(av) not in '\r\n':
+			if not case or chr(av) not in 'iksIKS':
+				run.append(chr(av))
+				continue
+		if run:
+			options.append([''.join(run)])
+			run = []
+		if op == sre_parse.SUBPATTERN:
+			if len(av) == 4 and (av[1] or av[2]):
+				continue
+			options.append(literals(av[-1], case))
+		elif op == sre_parse.BRANCH:
+			branches = [literals(b, case) for b in av[1]]
+			if all(branches):
+				options.append(sum(branches, []))
+		elif op in repeats and av[0] >= 1:
+			options.append(literals(av[2], case))
+	if run:
+		options.append([''.join(run)])
+	options = [o for o in options if o]
+	if not options:
+		return None
+	return max(options, key=lambda o: min(len(l) for l in o))
+
+def read(p, encoding, prefilter, stats):
+	with io.open(p, 'rb') as f:
+		data = f.read()
+	stats['bytes'] = len(data)
+	if prefilter is not None:
+		if b'\0' in data[:8192]:
+			stats['skipped'] = 'binary'
+			return []
+		if not prefilter.search(data):
+			stats['skipped'] = 'prefilter'
+			return []
+	try:
+		text = data.decode(encoding)
+	except UnicodeDecodeError as e:
+		stats['decode_error'] = True
+		text = data[:data.rfind(b'\n', 0, e.start) + 1].decode(encoding)
+	return io.StringIO(text, newline=None)
+
+def scan(p, lines, patterns, priority, encoding, prefilter, stats=None):
+	results = []
+	if stats is None:
+		stats = {}
+	timer = timeit.default_timer
+	try:
+		if lines is None:
+			start = timer()
+			lines = read(p, encoding, prefilter, stats)
+			stats['read'] = timer() - start
+		start = timer()
+		for num, line in enumerate(lines, 1):
+			for result in patterns.finditer(line):
+				for patt, note in result.groupdict().items():
+					if not note and note != '':
+						continue
+					priority_match = priority.search(note)
+					if(priority_match):
+						priority_num = int(priority_match.group(1))
+					else:
+						priority_num = 50
+					results.append({
+						'file': p,
+						'patt': patt,
+						'note': note,
+						'line': num,
+						'priority': priority_num
+					})
+		stats['match'] = timer() - start
+	except(IOError, UnicodeDecodeError) as e:
+		stats['error'] = type(e).__name__
+	return results
+
+def scan_chunk(chunk, patterns, priority, encoding, prefilter, profile=False):
+	scanned = []
+	for p, lines in chunk:
+		stats = {} if profile else None
+		results = scan(p, lines, patterns, priority, encoding, prefilter, stats)
+		scanned.append((results, stats))
+	return scanned
+
+reviews = {}
+thread = None
+
 class Settings():
 	def __init__(self, view, args):
 		self.user = sublime.load_settings('TodoReview.sublime-settings')
@@ -28,9 +150,117 @@ class Settings():
 	def get(self, key, default):
 		return self.proj.get(key, self.user.get(key, default))
 
+class Index():
+	def __init__(self, signature):
+		self.signature = signature
+		self.files = None
+		self.visited = set()
+		self.dirty = False
+		self.path = None
+		if settings.get('index', False) and hasattr(sublime, 'cache_path'):
+			self.path = os.path.join(sublime.cache_path(), 'TodoReview', 'index-%s.json' % signature)
+
+	def load(self):
+		self.files = {}
+		try:
+			with io.open(self.path, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+		except(IOError, ValueError):
+			return
+		if data.get('signature') == self.signature:
+			self.files = data.get('files', {})
+		else:
+			self.dirty = True
+
+	def get(self, p):
+		if self.path is None:
+			return None, None
+		self.visited.add(p)
+		try:
+			st = os.stat(p)
+		except OSError:
+			self.discard(p)
+			return None, None
+		if self.files is None:
+			self.load()
+		stat = [st.st_mtime, st.st_size]
+		entry = self.files.get(p)
+		if entry and entry[0] == stat:
+			return entry[1], stat
+		return None, stat
+
+	def put(self, p, stat, results):
+		if self.path is None or stat is None:
+			return
+		self.files[p] = [stat, results]
+		self.dirty = True
+
+	def discard(self, p):
+		if self.files and self.files.pop(p, None) is not None:
+			self.dirty = True
+
+	def keep(self, p):
+		self.visited.add(p)
+
+	def save(self):
+		if self.path is None or self.files is None:
+			return
+		# Drop the files that were deleted, moved or excluded since
+		for p in [p for p in self.files if p not in self.visited]:
+			del self.files[p]
+			self.dirty = True
+		if not self.dirty:
+			return
+		data = {'signature': self.signature, 'files': self.files}
+		tmp = self.path + '.tmp'
+		try:
+			if not os.path.isdir(os.path.dirname(self.path)):
+				os.makedirs(os.path.dirname(self.path))
+			with io.open(tmp, 'w', encoding='utf-8') as f:
+				f.write(json.dumps(data, ensure_ascii=False))
+			os.replace(tmp, self.path)
+		except(IOError, OSError):
+			return
+		self.dirty = False
+
+class Profile():
+	def __init__(self):
+		self.files = {}
+
+	def add(self, p, stats):
+		self.files.setdefault(p, {}).update(stats)
+
+	def report(self, time, count):
+		files = []
+		folders = {}
+		totals = {'time': time, 'files': count, 'bytes': 0, 'read': 0, 'match': 0,
+			'view': 0, 'cached': 0, 'skipped': 0, 'decode_errors': 0, 'errors': 0}
+		for p, stats in self.files.items():
+			item = dict(stats, file=p)
+			item['time'] = sum(stats.get(k, 0) for k in ('read', 'match', 'view'))
+			files.append(item)
+			for k in ('bytes', 'read', 'match', 'view'):
+				totals[k] += stats.get(k, 0)
+			totals['cached'] += int(stats.get('cached', False))
+			totals['skipped'] += int('skipped' in stats)
+			totals['decode_errors'] += int(stats.get('decode_error', False))
+			totals['errors'] += int('error' in stats)
+			folder = folders.setdefault(os.path.dirname(p), {'time': 0, 'files': 0, 'bytes': 0})
+			folder['time'] += item['time']
+			folder['files'] += 1
+			folder['bytes'] += stats.get('bytes', 0)
+		key = lambda m: (-m['time'], m.get('file', m.get('folder')))
+		folders = [dict(v, folder=k) for k, v in folders.items()]
+		return {
+			'totals': totals,
+			'files': sorted(files, key=key),
+			'folders': sorted(folders, key=key)
+		}
+
 class Engine():
-	def __init__(self, dirpaths, filepaths, view):
+	def __init__(self, dirpaths, filepaths, view, serial=False):
 		self.view = view
+		self.serial = serial
 		self.dirpaths = dirpaths
 		self.filepaths = filepaths
 		if settings.get('case_sensitive', False):
@@ -41,76 +271,212 @@ class Engine():
 		patt_files = settings.get('exclude_files', [])
 		patt_folders = settings.get('exclude_folders', [])
 		match_patterns = '|'.join(patt_patterns.values())
-		match_files = [fnmatch.translate(p) for p in patt_files]
-		match_folders = [fnmatch.translate(p) for p in patt_folders]
+		match_files = '|'.join('(?:%s)' % fnmatch.translate(p) for p in patt_files)
+		match_folders = '|'.join('(?:%s)' % fnmatch.translate(p) for p in patt_folders)
 
+		self.encoding = settings.get('encoding', 'utf-8')
 		self.patterns = re.compile(match_patterns, case)
+		self.prefilter = prefilter(match_patterns, case, self.encoding)
 		self.priority = re.compile(r'\(([0-9]{1,2})\)')
-		self.exclude_files = [re.compile(p) for p in match_files]
-		self.exclude_folders = [re.compile(p) for p in match_folders]
+		self.exclude_files = re.compile(match_files or '(?!)')
+		self.exclude_folders = re.compile(match_folders or '(?!)')
 		self.open = self.view.window().views()
-		self.open_files = [v.file_name() for v in self.open if v.file_name()]
+		self.open_files = set(v.file_name() for v in self.open if v.file_name())
+		self.index = Index(self.signature(case))
+		self.profile = Profile() if settings.get('profile', False) else None
 
 	def files(self):
-		seen_paths = []
-		for dirpath in self.dirpaths:
-			dirpath = self.resolve(dirpath)
-			for dirp, dirnames, filepaths in os.walk(dirpath, followlinks=True):
-				if any(p.search(dirp) for p in self.exclude_folders):
-					continue
-				for filepath in filepaths:
-					self.filepaths.append(os.path.join(dirp, filepath))
-		for filepath in self.filepaths:
-			p = self.resolve(filepath)
+		seen_paths = set()
+		listed = ((filepath, False) for filepath in list(self.filepaths))
+		walked = (self.walk(self.resolve(dirpath)) for dirpath in self.dirpaths)
+		walked = itertools.chain.from_iterable(walked)
+		for filepath, resolved in itertools.chain(listed, walked):
+			p = filepath if resolved else self.resolve(filepath)
 			if p in seen_paths:
 				continue
-			if any(p.search(filepath) for p in self.exclude_folders):
+			if self.exclude_folders.search(filepath):
 				continue
-			if any(p.search(filepath) for p in self.exclude_files):
+			if self.exclude_files.search(filepath):
 				continue
-			seen_paths.append(p)
+			seen_paths.add(p)
 			yield p
 
+	def walk(self, top):
+		symlinks = settings.get('resolve_symlinks', True)
+		stack = [(top, True)]
+		while stack:
+			dirp, resolved = stack.pop()
+			if self.exclude_folders.search(dirp):
+				continue
+			dirnames = []
+			filepaths = []
+			try:
+				for name, is_dir, is_link in self.listdir(dirp):
+					path = os.path.join(dirp, name)
+					entry = (path, resolved and not (symlinks and is_link))
+					if is_dir:
+						dirnames.append(entry)
+					else:
+						filepaths.append(entry)
+			except OSError:
+				continue
+			for entry in filepaths:
+				yield entry
+			stack.extend(reversed(dirnames))
+
+	def listdir(self, dirp):
+		if not hasattr(os, 'scandir'):
+			for name in os.listdir(dirp):
+				path = os.path.join(dirp, name)
+				yield name, os.path.isdir(path), os.path.islink(path)
+			return
+		for entry in os.scandir(dirp):
+			try:
+				is_dir = entry.is_dir()
+			except OSError:
+				is_dir = False
+			yield entry.name, is_dir, entry.is_symlink()
+
 	def extract(self, files):
-		encoding = settings.get('encoding', 'utf-8')
+		for results in self.scanned(files):
+			for result in results:
+				yield result
+
+	def scanned(self, files):
+		for chunk in self.chunks(files):
+			for results in chunk:
+				yield results
+
+	def chunks(self, files):
+		args = (self.patterns, self.priority, self.encoding, self.prefilter, self.profile is not None)
+		workers = self.workers()
+		pool = self.pool(workers)
+		if pool is None:
+			for batch in self.batch(files, 1):
+				yield self.complete(batch, scan_chunk(self.misses(batch), *args))
+			return
+		size = max(int(settings.get('engine_chunk_size', 64)), 1)
+		pending = []
+		# Set when the pool fails; the outstanding batches and all that
+		# follow are then scanned serially
+		self.broken = False
+		with pool:
+			for batch in self.batch(files, size):
+				misses = self.misses(batch)
+				future = self.submit(pool, misses, args) if misses else None
+				pending.append((batch, misses, future))
+				if len(pending) >= workers * 2:
+					yield self.collect(pending.pop(0), args)
+			while pending:
+				yield self.collect(pending.pop(0), args)
+
+	def submit(self, pool, misses, args):
+		if self.broken:
+			return None
+		try:
+			return pool.submit(scan_chunk, misses, *args)
+		except Exception:
+			# E.g. a broken process pool or arguments that can't be pickled
+			self.broken = True
+			return None
+
+	def collect(self, pending, args):
+		batch, misses, future = pending
+		scanned = None
+		if future is not None:
+			try:
+				scanned = future.result()
+			except Exception:
+				# E.g. a worker process that died or failed to start
+				self.broken = True
+		if scanned is None:
+			scanned = scan_chunk(misses, *args) if misses else []
+		return self.complete(batch, scanned)
+
+	def batch(self, files, size):
+		batch = []
 		for p in files:
+			start = timeit.default_timer()
+			lines = self.buffer(p)
+			if lines is None:
+				results, stat = self.index.get(p)
+			else:
+				results, stat = None, None
+				self.index.keep(p)
+			if self.profile is not None:
+				if lines is not None:
+					self.profile.add(p, {'view': timeit.default_timer() - start})
+				elif results is not None:
+					self.profile.add(p, {'cached': True})
+			batch.append((p, lines, results, stat))
+			if len(batch) == size:
+				yield batch
+				batch = []
+		if batch:
+			yield batch
+
+	def misses(self, batch):
+		return [(p, lines) for p, lines, results, stat in batch if results is None]
+
+	def complete(self, batch, scanned):
+		chunk = []
+		scanned = iter(scanned)
+		for p, lines, results, stat in batch:
+			if results is None:
+				results, stats = next(scanned)
+				self.index.put(p, stat, results)
+				if stats is not None:
+					self.profile.add(p, stats)
+			chunk.append(results)
+		return chunk
+
+	def buffer(self, p):
+		if p not in self.open_files:
+			return None
+		for view in self.open:
+			if view.file_name() == p:
+				lines = view.lines(sublime.Region(0, view.size()))
+				return [view.substr(line) for line in lines]
+		return None
+
+	def workers(self):
+		if self.serial:
+			return 1
+		workers = settings.get('engine_workers', 1)
+		if workers == 'auto':
 			try:
-				if p in self.open_files:
-					for view in self.open:
-						if view.file_name() == p:
-							f = []
-							lines = view.lines(sublime.Region(0, view.size()))
-							for line in lines:
-								f.append(view.substr(line))
-							break
-				else:
-					f = io.open(p, 'r', encoding=encoding)
-				for num, line in enumerate(f, 1):
-					for result in self.patterns.finditer(line):
-						for patt, note in result.groupdict().items():
-							if not note and note != '':
-								continue
-							priority_match = self.priority.search(note)
-							if(priority_match):
-								priority = int(priority_match.group(1))
-							else:
-								priority = 50
-							yield {
-								'file': p,
-								'patt': patt,
-								'note': note,
-								'line': num,
-								'priority': priority
-							}
-			except(IOError, UnicodeDecodeError):
-				f = None
-			finally:
-				thread.increment()
-				if f is not None and type(f) is not list:
-					f.close()
+				import multiprocessing
+				workers = multiprocessing.cpu_count()
+			except(ImportError, NotImplementedError):
+				workers = 1
+		return max(int(workers), 1)
+
+	def pool(self, workers):
+		if futures is None or workers < 2:
+			return None
+		if settings.get('engine_pool', 'thread') == 'process':
+			try:
+				return futures.ProcessPoolExecutor(workers)
+			except(ImportError, NotImplementedError, OSError):
+				pass
+		return futures.ThreadPoolExecutor(workers)
 
 	def process(self):
-		return self.extract(self.files())
+		return itertools.chain.from_iterable(self.stream())
+
+	def stream(self):
+		for results in self.scanned(self.files()):
+			yield results
+		self.index.save()
+
+	def signature(self, case):
+		keys = ['patterns', 'encoding', 'exclude_files', 'exclude_folders']
+		data = [case] + [settings.get(k, None) for k in keys]
+		# Every set of folders has its own index, so that projects don't
+		# discard each other's
+		data.append(sorted(self.resolve(d) for d in self.dirpaths))
+		data = json.dumps(data, sort_keys=True).encode('utf-8')
+		return hashlib.sha1(data).hexdigest()
 
 	def resolve(self, directory):
 		if settings.get('resolve_symlinks', True):
@@ -119,10 +485,11 @@ class Engine():
 			return os.path.expanduser(os.path.abspath(directory))
 
 class Thread(threading.Thread):
-	def __init__(self, engine, callback):
+	def __init__(self, engine, callback, report=None):
 		self.i = 0
 		self.engine = engine
 		self.callback = callback
+		self.report = report
 		self.lock = threading.RLock()
 		threading.Thread.__init__(self)
 
@@ -134,8 +501,25 @@ class Thread(threading.Thread):
 			self.thread()
 
 	def thread(self):
-		results = list(self.engine.process())
-		self.callback(results, self.finish(), self.i)
+		stream = settings.get('render_stream', False)
+		interval = settings.get('render_stream_interval', 250) / 1000.0
+		batch = []
+		append = False
+		last = self.start
+		for results in self.engine.stream():
+			self.increment()
+			batch.extend(results)
+			if not stream:
+				continue
+			now = timeit.default_timer()
+			if batch and (not append or now - last >= interval):
+				self.callback(batch, self.finish(), self.i, append, True)
+				batch = []
+				append = True
+				last = now
+		self.callback(batch, self.finish(), self.i, append)
+		if self.engine.profile is not None and self.report is not None:
+			self.report(self.engine.profile.report(self.finish(), self.i))
 
 	def finish(self):
 		return round(timeit.default_timer() - self.start, 2)
@@ -175,32 +559,65 @@ class TodoReviewCommand(sublime_plugin.TextCommand):
 			else:
 				paths = []
 		engine = Engine(paths, filepaths, self.view)
-		thread = Thread(engine, self.render)
+		self.paths = [engine.resolve(p) for p in paths + filepaths]
+		thread = Thread(engine, self.render, self.report)
 		thread.start()
 
-	def render(self, results, time, count):
+	def render(self, results, time, count, append=False, partial=False):
 		self.view.run_command('todo_review_render', {
 			"results": results,
 			"time": time,
 			"count": count,
-			"args": self.args
+			"args": self.args,
+			"append": append,
+			"partial": partial,
+			"paths": self.paths
+		})
+
+	def report(self, report):
+		self.view.run_command('todo_review_profile', {
+			"report": report
 		})
 
 class TodoReviewRender(sublime_plugin.TextCommand):
-	def run(self, edit, results, time, count, args):
+	def run(self, edit, results, time, count, args, append=False, paths=None, replace=None, partial=False):
 		self.args = args
 		self.edit = edit
 		self.time = time
 		self.count = count
-		self.results = results
+		self.rview = self.get_view(append)
+		self.view.settings().set('todo_review_target', self.rview.id())
+		if not append or self.rview.id() not in reviews:
+			reviews[self.rview.id()] = {'results': [], 'header': 0, 'sections': [], 'paths': paths or []}
+		self.review = reviews[self.rview.id()]
+		self.review['time'] = time
+		self.review['count'] = count
+		if replace is not None:
+			self.patch(replace, results)
+		else:
+			self.review['results'].extend(results)
+		self.results = self.review['results']
+		if partial and append and self.review.get('stream'):
+			self.draw_partial(results)
+			return
 		self.sorted = self.sort()
-		self.rview = self.get_view()
 		self.draw_header()
 		self.draw_results()
-		self.window.focus_view(self.rview)
+		if not append:
+			self.window.focus_view(self.rview)
 		self.args['settings'] = settings.proj
 		self.rview.settings().set('review_args', self.args)
 
+	def patch(self, p, results):
+		old = self.review['results']
+		idx = len(old)
+		for i, item in enumerate(old):
+			if item['file'] == p:
+				idx = i
+				break
+		kept = [item for item in old if item['file'] != p]
+		self.review['results'] = kept[:idx] + results + kept[idx:]
+
 	def sort(self):
 		self.largest = 0
 		for item in self.results:
@@ -211,11 +628,17 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 		results = sorted(self.results, key=key)
 		return itertools.groupby(results, key=lambda m: m['patt'])
 
-	def get_view(self):
+	def get_view(self, append):
 		self.window = sublime.active_window()
+		if append:
+			view = self.target()
+			if view is not None:
+				self.window = view.window() or self.window
+				return view
 		for view in self.window.views():
 			if view.settings().get('todo_results', False):
-				view.erase(self.edit, sublime.Region(0, view.size()))
+				if not append:
+					view.erase(self.edit, sublime.Region(0, view.size()))
 				return view
 		view = self.window.new_file()
 		view.set_name('TodoReview')
@@ -231,6 +654,17 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 		view.settings().set('command_mode', True)
 		return view
 
+	def target(self):
+		# The results view being patched, or the one this review started
+		if self.view.settings().get('todo_results', False):
+			return self.view
+		target = self.view.settings().get('todo_review_target')
+		for window in sublime.windows():
+			for view in window.views():
+				if view.id() == target:
+					return view
+		return None
+
 	def draw_header(self):
 		forms = settings.get('render_header_format', '%d - %c files in %t secs')
 		datestr = settings.get('render_header_date', '%A %m/%d/%y at %I:%M%p')
@@ -247,17 +681,21 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 			.replace('%t', str(self.time)) \
 			.replace('%c', str(self.count))
 		res += '\n'
-		self.rview.insert(self.edit, self.rview.size(), res)
+		self.rview.replace(self.edit, sublime.Region(0, self.review['header']), res)
+		self.review['header'] = len(res)
 
 	def draw_results(self):
-		data = [x[:] for x in [[]] * 2]
-		for patt, items in self.sorted:
-			items = list(items)
+		sections = []
+		patts = []
+		items = []
+		for patt, group in self.sorted:
+			group = list(group)
+			patts.append(patt)
 			res = '\n## %t (%n)\n' \
 				.replace('%t', patt.upper()) \
-				.replace('%n', str(len(items)))
-			self.rview.insert(self.edit, self.rview.size(), res)
-			for idx, item in enumerate(items, 1):
+				.replace('%n', str(len(group)))
+			lines = [res]
+			for idx, item in enumerate(group, 1):
 				line = '%i. %f' \
 					.replace('%i', str(idx)) \
 					.replace('%f', self.draw_file(item))
@@ -265,14 +703,74 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 					.replace('%f', line) \
 					.replace('%s', ' '*max((self.largest - len(line)), 1)) \
 					.replace('%n', item['note'])
-				start = self.rview.size()
-				self.rview.insert(self.edit, start, res)
-				region = sublime.Region(start, self.rview.size())
-				data[0].append(region)
-				data[1].append(item)
-		self.rview.add_regions('results', data[0], '')
-		d = dict(('{0},{1}'.format(k.a, k.b), v) for k, v in zip(data[0], data[1]))
+				lines.append(res)
+				items.append(item)
+			sections.append(lines)
+		texts = [''.join(lines) for lines in sections]
+		keep = 0
+		old = self.review['sections']
+		while keep < min(len(old), len(texts)) and old[keep] == texts[keep]:
+			keep += 1
+		start = self.review['header'] + sum(len(t) for t in texts[:keep])
+		self.rview.erase(self.edit, sublime.Region(start, self.rview.size()))
+		self.rview.insert(self.edit, start, ''.join(texts[keep:]))
+		self.review['sections'] = texts
+		regions = []
+		start = self.review['header']
+		for lines in sections:
+			start += len(lines[0])
+			for res in lines[1:]:
+				regions.append(sublime.Region(start, start + len(res)))
+				start += len(res)
+		self.rview.add_regions('results', regions, '')
+		d = dict(('{0},{1}'.format(k.a, k.b), v) for k, v in zip(regions, items))
 		self.rview.settings().set('review_results', d)
+		# Where draw_partial appends to each section: [pattern, end, count]
+		end = self.review['header']
+		stream = []
+		for patt, lines in zip(patts, sections):
+			end += sum(len(res) for res in lines)
+			stream.append([patt, end, len(lines) - 1])
+		self.review['stream'] = {'sections': stream, 'largest': self.largest}
+
+	def draw_partial(self, results):
+		# Streamed results are appended to their sections in the order they
+		# arrive.  The counts, the alignment of the lines drawn before, the
+		# header and the navigation are left as they are until the final
+		# draw_results, so each update only costs as much as the new results.
+		stream = self.review['stream']
+		sections = stream['sections']
+		self.review['sections'] = []
+		maxspaces = settings.get('render_maxspaces', 50)
+		for item in results:
+			stream['largest'] = max(stream['largest'], min(len(self.draw_file(item)), maxspaces) + 6)
+		w = settings.get('patterns_weight', {})
+		key = lambda patt: str(w.get(patt.upper(), patt))
+		groups = collections.OrderedDict()
+		for item in results:
+			groups.setdefault(item['patt'], []).append(item)
+		for patt, group in groups.items():
+			i = 0
+			while i < len(sections) and sections[i][0] != patt and key(sections[i][0]) <= key(patt):
+				i += 1
+			res = ''
+			if i == len(sections) or sections[i][0] != patt:
+				end = sections[i - 1][1] if i else self.review['header']
+				sections.insert(i, [patt, end, 0])
+				res = '\n## %t\n'.replace('%t', patt.upper())
+			section = sections[i]
+			for item in group:
+				section[2] += 1
+				line = '%i. %f' \
+					.replace('%i', str(section[2])) \
+					.replace('%f', self.draw_file(item))
+				res += '%f%s%n\n' \
+					.replace('%f', line) \
+					.replace('%s', ' '*max((stream['largest'] - len(line)), 1)) \
+					.replace('%n', item['note'])
+			self.rview.insert(self.edit, section[1], res)
+			for section in sections[i:]:
+				section[1] += len(res)
 
 	def draw_file(self, item):
 		if settings.get('render_include_folder', False):
@@ -293,6 +791,119 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 			.replace('%f', f) \
 			.replace('%l', str(item['line']))
 
+class TodoReviewProfile(sublime_plugin.TextCommand):
+	def run(self, edit, report):
+		self.edit = edit
+		self.report = report
+		self.rview = self.get_view()
+		if settings.get('profile', False) == 'json':
+			res = json.dumps(report, indent=4, sort_keys=True)
+		else:
+			res = self.draw_report()
+		self.rview.insert(self.edit, 0, res)
+
+	def get_view(self):
+		self.window = sublime.active_window()
+		for view in self.window.views():
+			if view.settings().get('todo_profile', False):
+				view.erase(self.edit, sublime.Region(0, view.size()))
+				return view
+		view = self.window.new_file()
+		view.set_name('TodoReview Profile')
+		view.set_scratch(True)
+		view.settings().set('todo_profile', True)
+		if sys.version_info < (3,0,0):
+			view.set_syntax_file('Packages/TodoReview/TodoReview.hidden-tmLanguage')
+		else:
+			view.assign_syntax('Packages/TodoReview/TodoReview.hidden-tmLanguage')
+		view.settings().set('word_wrap', False)
+		return view
+
+	def draw_report(self):
+		limit = settings.get('profile_limit', 25)
+		totals = self.report['totals']
+		res = '// %c files in %t secs, %b read\n' \
+			.replace('%c', str(totals['files'])) \
+			.replace('%t', str(totals['time'])) \
+			.replace('%b', self.draw_size(totals['bytes']))
+		res += '\n## TOTALS\n'
+		for k in ('read', 'match', 'view'):
+			res += '%k%s%v secs\n' \
+				.replace('%k', k) \
+				.replace('%s', ' '*(16 - len(k))) \
+				.replace('%v', '%.3f' % totals[k])
+		for k in ('cached', 'skipped', 'decode_errors', 'errors'):
+			res += '%k%s%v files\n' \
+				.replace('%k', k) \
+				.replace('%s', ' '*(16 - len(k))) \
+				.replace('%v', str(totals[k]))
+		for title, key in (('SLOWEST FILES', 'file'), ('SLOWEST FOLDERS', 'folder')):
+			items = self.report[key + 's'][:limit]
+			res += '\n## %t (%n)\n' \
+				.replace('%t', title) \
+				.replace('%n', str(len(items)))
+			largest = max([len(item[key]) for item in items] + [0]) + 6
+			for idx, item in enumerate(items, 1):
+				line = '%i. %f'.replace('%i', str(idx)).replace('%f', item[key])
+				res += '%f%s%t secs  %b\n' \
+					.replace('%f', line) \
+					.replace('%s', ' '*max((largest - len(line)), 1)) \
+					.replace('%t', '%.4f' % item['time']) \
+					.replace('%b', self.draw_size(item.get('bytes', 0)))
+		return res
+
+	def draw_size(self, size):
+		for unit in ('B', 'KB', 'MB'):
+			if size < 1024:
+				break
+			size /= 1024.0
+		else:
+			unit = 'GB'
+		return '%.1f %s' % (size, unit) if unit != 'B' else '%d B' % size
+
+class TodoReviewListener(sublime_plugin.EventListener):
+	def on_close(self, view):
+		reviews.pop(view.id(), None)
+
+	def on_post_save(self, view):
+		if sys.version_info < (3,0,0):
+			self.watch(view)
+
+	def on_post_save_async(self, view):
+		self.watch(view)
+
+	def watch(self, view):
+		if not view.file_name() or view.window() is None:
+			return
+		if thread is not None and thread.is_alive():
+			return
+		for rview in view.window().views():
+			review = reviews.get(rview.id())
+			if review is not None:
+				self.patch(view, rview, review)
+
+	def patch(self, view, rview, review):
+		global settings
+		args = rview.settings().get('review_args', {})
+		settings = Settings(rview, args.get('settings', False))
+		if not settings.get('watch', False):
+			return
+		# A single file: never worth starting a worker pool for
+		engine = Engine([], [view.file_name()], view, serial=True)
+		p = engine.resolve(view.file_name())
+		if not any(item['file'] == p for item in review['results']):
+			if not any(p == d or p.startswith(os.path.join(d, '')) for d in review['paths']):
+				return
+		results = list(engine.extract(engine.files()))
+		rview.run_command('todo_review_render', {
+			"results": results,
+			"time": review['time'],
+			"count": review['count'],
+			"args": args,
+			"append": True,
+			"replace": p
+		})
+
 class TodoReviewResults(sublime_plugin.TextCommand):
 	def run(self, edit, **args):
 		self.settings = self.view.settings()
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+    pygments.benchmark
+    ~~~~~~~~~~~~~~~~~~
+
+    Lexer throughput benchmark.
+
+    Lexes a corpus of source files with the lexers that match their file
+    names and reports, per lexer, tokens and bytes per second, the peak
+    memory used while lexing and the most expensive rules as measured with
+    `ProfilingRegexLexerMeta`.  The results can be written as JSON and
+    compared to the results of an earlier run, e.g. of a previous version::
+
+        python -m pygments.benchmark -o old.json corpus/
+        # ... change things ...
+        python -m pygments.benchmark -c old.json -o new.json corpus/
+
+    With ``-c``, the exit status is 1 if any lexer got slower by more than
+    the threshold given with ``-t`` (default: 10%).
+
+    Only lexers that have files in the corpus are measured, so the corpus
+    decides the coverage.
+
+    :copyright: Copyright 2006-2015 by the Pygments team, see AUTHORS.
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import json
+import getopt
+import platform
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from pygments import __version__
+from pygments.lexer import RegexLexerMeta, ProfilingRegexLexerMeta
+from pygments.lexers import get_lexer_by_name, find_lexer_class_for_filename
+from pygments.util import ClassNotFound, guess_decode
+
+__all__ = ['collect_corpus', 'benchmark', 'compare']
+
+# monotonic high resolution timer; Python 2 only has time.time()
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+USAGE = """\
+Usage: %s [-l <lexer>] [-r <repeat>] [-n <top>] [-o <output>]
+          [-c <baseline> [-t <threshold>]] <file or directory> ...
+
+Lex the given files (directories are searched recursively) with the lexer
+matching each file name, or with <lexer> for all files, and print
+throughput, peak memory and the <top> (default: 10) most expensive rules
+for every lexer.  Timings are the best of <repeat> (default: 3) runs.
+
+-o writes the results as JSON to <output>.  -c compares them to the JSON
+results of an earlier run and exits with status 1 if the throughput of a
+lexer dropped by more than <threshold> (default: 0.1, i.e. 10%%).
+"""
+
+
+def collect_corpus(paths, lexername=None):
+    """
+    Return a dictionary mapping lexer classes to lists of the decoded texts
+    of the files in `paths` that they should lex.  Directories are searched
+    recursively; files without a matching lexer are ignored.
+    """
+    fixed = lexername and type(get_lexer_by_name(lexername)) or None
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                filenames.extend(os.path.join(root, fn)
+                                 for fn in sorted(files))
+        else:
+            filenames.append(path)
+    corpus = {}
+    for fn in filenames:
+        with open(fn, 'rb') as fp:
+            text = guess_decode(fp.read())[0]
+        cls = fixed or find_lexer_class_for_filename(fn, text)
+        if cls is not None:
+            corpus.setdefault(cls, []).append(text)
+    return corpus
+
+
+def _count_tokens(lexer, text):
+    n = 0
+    for _ in lexer.get_tokens(text):
+        n += 1
+    return n
+
+
+def _profile_rules(cls, texts, top):
+    """Lex `texts` with a profiling subclass of `cls`, return the top rules."""
+    if not isinstance(cls, RegexLexerMeta):
+        return None
+    prof_data = [{}]
+    profcls = ProfilingRegexLexerMeta(cls.__name__, (cls,),
+                                      {'_prof_data': prof_data})
+    lexer = profcls()
+    for text in texts:
+        _count_tokens(lexer, text)
+    rules = sorted(prof_data[0].items(), key=lambda item: -item[1][1])
+    return [{'state': state, 'regex': regex[:80], 'calls': calls,
+             'seconds': seconds}
+            for ((state, regex), (calls, seconds)) in rules[:top]]
+
+
+def _peak_memory(lexer, texts):
+    """Return the peak memory in bytes allocated while lexing `texts`."""
+    if tracemalloc is None:
+        return None
+    peak = 0
+    tracemalloc.start()
+    try:
+        for text in texts:
+            tracemalloc.clear_traces()
+            base = tracemalloc.get_traced_memory()[0]
+            _count_tokens(lexer, text)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark(corpus, repeat=3, top=10):
+    """
+    Benchmark the lexers in `corpus`, as returned by `collect_corpus`.
+    Return a dictionary with the results, keyed by lexer class name.
+    """
+    results = {}
+    for cls, texts in corpus.items():
+        # the token definitions are processed here, not while timing
+        lexer = cls()
+        tokens = sum(_count_tokens(lexer, text) for text in texts)
+        best = None
+        for _ in range(repeat):
+            t0 = _clock()
+            for text in texts:
+                _count_tokens(lexer, text)
+            t = _clock() - t0
+            if best is None or t < best:
+                best = t
+        best = max(best, 1e-9)
+        nbytes = sum(len(text.encode('utf-8')) for text in texts)
+        results[cls.__name__] = {
+            'name': cls.name,
+            'files': len(texts),
+            'bytes': nbytes,
+            'tokens': tokens,
+            'seconds': best,
+            'tokens_per_sec': tokens / best,
+            'bytes_per_sec': nbytes / best,
+            'peak_memory': _peak_memory(lexer, texts),
+            'rules': _profile_rules(cls, texts, top),
+        }
+    return results
+
+
+def compare(old, new, threshold=0.1):
+    """
+    Compare two ``'lexers'`` dictionaries of results.  Return a list of
+    ``(lexer, message, is_regression)`` tuples for the lexers whose
+    throughput or token count changed noticeably.
+    """
+    changes = []
+    for name in sorted(new):
+        if name not in old:
+            continue
+        o, n = old[name], new[name]
+        ratio = n['bytes_per_sec'] / o['bytes_per_sec'] - 1
+        if ratio < -threshold:
+            changes.append((name, 'throughput %+.1f%%' % (100 * ratio), True))
+        elif ratio > threshold:
+            changes.append((name, 'throughput %+.1f%%' % (100 * ratio),
+                            False))
+        if o['bytes'] == n['bytes'] and o['tokens'] != n['tokens']:
+            changes.append((name, 'token count %d -> %d' %
+                            (o['tokens'], n['tokens']), False))
+    return changes
+
+
+def _print_results(results, top):
+    print('%-28s %6s %10s %10s %12s %12s %10s' %
+          ('lexer', 'files', 'bytes', 'tokens', 'tokens/s', 'bytes/s',
+           'peak mem'))
+    print('-' * 94)
+    for name in sorted(results):
+        r = results[name]
+        print('%-28s %6d %10d %10d %12.0f %12.0f %10s' %
+              (name[:28], r['files'], r['bytes'], r['tokens'],
+               r['tokens_per_sec'], r['bytes_per_sec'],
+               r['peak_memory'] is None and '-' or r['peak_memory']))
+    if not top:
+        return
+    for name in sorted(results):
+        rules = results[name]['rules']
+        if not rules:
+            continue
+        print()
+        print('Most expensive rules of %s:' % name)
+        print('%-20s %-56s %8s %9s' % ('state', 'regex', 'ncalls', 'tottime'))
+        for rule in rules:
+            print('%-20s %-56s %8d %9.4f' %
+                  (rule['state'][:20], rule['regex'][:56],
+                   rule['calls'], rule['seconds']))
+
+
+def main(args=sys.argv):
+    """
+    Main entry point of the benchmark.
+    """
+    usage = USAGE % args[0]
+    try:
+        popts, args = getopt.getopt(args[1:], 'l:r:n:o:c:t:h')
+    except getopt.GetoptError:
+        print(usage, file=sys.stderr)
+        return 2
+    opts = dict(popts)
+    if '-h' in opts:
+        print(usage)
+        return 0
+    if not args:
+        print(usage, file=sys.stderr)
+        return 2
+    try:
+        repeat = int(opts.get('-r', 3))
+        top = int(opts.get('-n', 10))
+        threshold = float(opts.get('-t', 0.1))
+    except ValueError:
+        print(usage, file=sys.stderr)
+        return 2
+
+    try:
+        corpus = collect_corpus(args, opts.get('-l'))
+    except (IOError, OSError, ClassNotFound) as err:
+        print('Error:', err, file=sys.stderr)
+        return 1
+
+    results = benchmark(corpus, max(repeat, 1), top)
+    _print_results(results, top)
+
+    if '-o' in opts:
+        data = {
+            'pygments': __version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'lexers': results,
+        }
+        with open(opts['-o'], 'w') as fp:
+            json.dump(data, fp, indent=1, sort_keys=True)
+
+    if '-c' in opts:
+        try:
+            with open(opts['-c']) as fp:
+                baseline = json.load(fp)
+        except (IOError, OSError, ValueError) as err:
+            print('Error: cannot read baseline:', err, file=sys.stderr)
+            return 1
+        changes = compare(baseline['lexers'], results, threshold)
+        print()
+        print('Compared to %s (Pygments %s, Python %s):' %
+              (opts['-c'], baseline['pygments'], baseline['python']))
+        for name, message, regression in changes:
+            print('%s %s: %s' % (regression and 'REGRESSION' or '          ',
+                                 name, message))
+        if not changes:
+            print('no changes above the threshold')
+        if [c for c in changes if c[2]]:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
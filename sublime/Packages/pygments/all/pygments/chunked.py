@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+    pygments.chunked
+    ~~~~~~~~~~~~~~~~
+
+    Lexing of large inputs in chunks, in several processes.
+
+    :copyright: Copyright 2006-2015 by the Pygments team, see AUTHORS.
+    :license: BSD, see LICENSE for details.
+"""
+
+from itertools import islice
+
+try:
+    from itertools import izip
+except ImportError:
+    izip = zip
+
+from pygments.lexer import Lexer, RegexLexer, ExtendedRegexLexer
+from pygments.incremental import _lexer_loop, _regex_lex, _extended_lex
+from pygments.util import get_int_opt
+
+__all__ = ['ChunkedLexer']
+
+
+# set in the worker processes by _init_worker
+_worker_lexer = None
+_worker_text = None
+
+
+def _init_worker(cls, options, text):
+    global _worker_lexer, _worker_text
+    # instantiated here: the token definitions are processed when the
+    # class is called, not when an instance is unpickled
+    _worker_lexer = cls(**options)
+    _worker_text = text
+
+
+def _lex_chunk(job):
+    """
+    Lex the chunk ``text[start:end]`` from the initial state, and on to
+    the first line start at or after `end`.
+
+    Returns a ``(stop, state, tokens, checkpoints)`` tuple: the line
+    start where lexing stopped and the state there (None if the end of the
+    text was reached), the tokens and the ``(index, token number, state)``
+    checkpoints at every line start.  The tokens are sent as separate lists
+    of indexes, token types and values: unpickling a tuple per token takes
+    much longer, mostly because of the garbage collector.
+    """
+    start, end, state = job
+    lexer, text = _worker_lexer, _worker_text
+    lex = _lexer_loop(lexer) is RegexLexer and _regex_lex or _extended_lex
+    indexes = []
+    tokentypes = []
+    values = []
+    tokens = (indexes, tokentypes, values)
+    checkpoints = []
+    for pos, tokentype, value in lex(lexer, text, start, state):
+        if tokentype is None:
+            # lexers may still match the empty string at the very end
+            if end <= pos < len(text) and pos > start:
+                return pos, value, tokens, checkpoints
+            checkpoints.append((pos, len(indexes), value))
+            continue
+        indexes.append(pos)
+        tokentypes.append(tokentype)
+        values.append(value)
+    return len(text), None, tokens, checkpoints
+
+
+class ChunkedLexer(Lexer):
+    """
+    Wraps a `RegexLexer` or `ExtendedRegexLexer` to lex large inputs in
+    chunks that are lexed concurrently in several processes.
+
+    The input is split into chunks at line starts, and every chunk is
+    lexed as if the line started in the ``'root'`` state, the state the
+    lexers also fall back to after an error at the end of a line.  When
+    the chunks are joined, the state in which the previous chunk reached
+    a line start is compared with the state the next chunk had there; the
+    tokens of the next chunk are used from the first line start where
+    they agree.  Until then, that part of the input is lexed again in the
+    calling process, starting with the right state.  The result is the
+    same token stream as that of the wrapped lexer.
+
+    This pays off for input with frequent resync points, e.g. log files
+    or long source files in languages where most lines start at the top
+    level.  In the worst case, a state that never agrees with the chunk
+    starts, the input is lexed once more in the calling process.  Lexers
+    that override `get_tokens_unprocessed`, and inputs shorter than two
+    chunks, are lexed in the calling process right away.
+
+    Like with other lexers, the input is preprocessed according to the
+    options of the wrapped lexer, and its filters are applied.
+
+    Options accepted:
+
+    `jobs`
+        Number of processes to use (default: the number of CPUs).
+
+    `chunksize`
+        Approximate number of characters per chunk (default: 1048576).
+
+    .. versionadded:: 2.1
+    """
+
+    def __init__(self, lexer, **options):
+        self.lexer = lexer
+        Lexer.__init__(self, **dict(lexer.options, **options))
+        self.filters = lexer.filters
+        self.jobs = get_int_opt(options, 'jobs', 0)
+        self.chunksize = max(get_int_opt(options, 'chunksize', 1 << 20), 1)
+
+    def _chunks(self, text):
+        """Return the ``(start, end)`` chunks of `text`."""
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = text.find('\n', start + self.chunksize - 1) + 1 or len(text)
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+    def get_tokens_unprocessed(self, text):
+        lexer = self.lexer
+        loop = _lexer_loop(lexer)
+        if loop is RegexLexer:
+            lex, root = _regex_lex, ('root',)
+        elif loop is ExtendedRegexLexer:
+            lex, root = _extended_lex, (('root',), {})
+        else:
+            lex = None
+        chunks = self._chunks(text)
+        jobs = self.jobs
+        if lex is not None and len(chunks) > 1 and jobs <= 0:
+            try:
+                import multiprocessing
+                jobs = multiprocessing.cpu_count()
+            except (ImportError, NotImplementedError):
+                jobs = 1
+        if lex is None or len(chunks) < 2 or jobs < 2:
+            for item in lexer.get_tokens_unprocessed(text):
+                yield item
+            return
+
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, _init_worker,
+                                    (type(lexer), lexer.options, text))
+        try:
+            results = pool.imap(_lex_chunk, [(start, end, root)
+                                             for start, end in chunks])
+            for item in self._join(lex, text, root, results):
+                yield item
+        finally:
+            pool.terminate()
+
+    def _join(self, lex, text, root, results):
+        """Join the chunk results, lexing again where they don't agree."""
+        lexer = self.lexer
+        # the line start up to which the tokens are known, and the state
+        # there
+        pos, state = 0, root
+        for stop, stopstate, tokens, checkpoints in results:
+            if state is None:
+                # the end of the text was reached
+                break
+            if pos >= stop:
+                # lexed past this chunk already
+                continue
+            known = dict((cpos, (index, cstate))
+                         for cpos, index, cstate in checkpoints)
+            resync = None
+            # the first checkpoint yielded is at pos itself
+            for tpos, tokentype, value in lex(lexer, text, pos, state):
+                if tokentype is not None:
+                    yield tpos, tokentype, value
+                    continue
+                if tpos in known and known[tpos][1] == value:
+                    resync = known[tpos][0]
+                    break
+                pos, state = tpos, value
+                if stop <= tpos < len(text):
+                    break
+            else:
+                state = None
+            if resync is None:
+                continue
+            indexes, tokentypes, values = tokens
+            for item in izip(islice(indexes, resync, None),
+                             islice(tokentypes, resync, None),
+                             islice(values, resync, None)):
+                yield item
+            pos, state = stop, stopstate
+        if state is not None:
+            for tpos, tokentype, value in lex(lexer, text, pos, state):
+                if tokentype is not None:
+                    yield tpos, tokentype, value
@@ -11,6 +11,7 @@
 
 from __future__ import print_function
 
+import os
 import sys
 import getopt
 from textwrap import dedent
@@ -19,7 +20,8 @@ from pygments import __version__, highlight
 from pygments.util import ClassNotFound, OptionError, docstring_headline, \
     guess_decode, guess_decode_from_terminal, terminal_encoding
 from pygments.lexers import get_all_lexers, get_lexer_by_name, guess_lexer, \
-    get_lexer_for_filename, find_lexer_class_for_filename, TextLexer
+    get_lexer_for_filename, find_lexer_class_for_filename, TextLexer, \
+    BinaryTokenLexer
 from pygments.formatters.latex import LatexEmbeddedLexer, LatexFormatter
 from pygments.formatters import get_all_formatters, get_formatter_by_name, \
     get_formatter_for_filename, find_formatter_class, \
@@ -32,6 +34,10 @@ USAGE = """\
 Usage: %s [-l <lexer> | -g] [-F <filter>[:<options>]] [-f <formatter>]
           [-O <options>] [-P <option=value>] [-s] [-v] [-o <outfile>] [<infile>]
 
+       %s -d <outdir> [-l <lexer> | -g] [-F <filter>[:<options>]] -f <formatter>
+          [-O <options>] [-P <option=value>] [-j <jobs>] [-m <manifest>]
+          [<infile> ...]
+
        %s -S <style> -f <formatter> [-a <arg>] [-O <options>] [-P <option=value>]
        %s -L [<which> ...]
        %s -N <filename>
@@ -70,6 +76,16 @@ not be spaces around the colon).
 
 The -O, -P and -F options can be given multiple times.
 
+With the -d option, highlight many files at once and write the results to
+the directory <outdir>.  The input files are the given <infile>s and the
+files listed in <manifest>, one per line ("-" reads the list from stdin).
+Each result keeps the path of its input relative to the common directory
+of all inputs, with the extension of the formatter appended, e.g.
+"out/pkg/mod.py.html".  The files are distributed across <jobs> worker
+processes (default: the number of CPUs), and every worker reuses its
+lexer and formatter instances from file to file.  Inputs that would be
+written to the same result, such as a file given twice, are an error.
+
 With the -S option, print out style definitions for style <style>
 for formatter <formatter>. The argument given by -a is formatter
 dependent.
@@ -313,6 +329,10 @@ def main_inner(popts, args, usage):
     F_opts = _parse_filters(F_opts)
     opts.pop('-F', None)
 
+    # handle ``pygmentize -d``
+    if '-d' in opts:
+        return _main_batch(opts, args, parsed_opts, F_opts, usage)
+
     # select lexer
     lexer = None
 
@@ -345,6 +365,7 @@ def main_inner(popts, args, usage):
         except Exception as err:
             print('Error: cannot read infile:', err, file=sys.stderr)
             return 1
+        rawcode = code
         if not inencoding:
             code, inencoding = guess_decode(code)
 
@@ -373,6 +394,7 @@ def main_inner(popts, args, usage):
             code = sys.stdin.buffer.read()
         else:
             code = sys.stdin.read()
+        rawcode = code
         if not inencoding:
             code, inencoding = guess_decode_from_terminal(code, sys.stdin)
             # else the lexer will do the decoding
@@ -388,6 +410,10 @@ def main_inner(popts, args, usage):
                   file=sys.stderr)
             return 2
 
+    # binary token streams must not be decoded
+    if isinstance(lexer, BinaryTokenLexer) and '-s' not in opts:
+        code = rawcode
+
     # process filters
     for fname, fopts in F_opts:
         try:
@@ -487,14 +513,193 @@ def main_inner(popts, args, usage):
             return 0
 
 
+class _BatchWorker(object):
+    """
+    Highlights files for ``pygmentize -d``.  One instance is created per
+    worker process, so that the formatter and the lexers are only set up
+    once per process and not once per file.
+    """
+
+    def __init__(self, lexername, guess, parsed_opts, F_opts, fmtername):
+        self.guess = guess
+        self.parsed_opts = parsed_opts
+        self.F_opts = F_opts
+        self.inencoding = parsed_opts.get('inencoding',
+                                          parsed_opts.get('encoding'))
+        self.outencoding = parsed_opts.get('outencoding',
+                                           parsed_opts.get('encoding'))
+        self.formatter = get_formatter_by_name(fmtername, **parsed_opts)
+        self.lexers = {}
+        self.lexer = None
+        if lexername:
+            self.lexer = self._make_lexer(
+                type(get_lexer_by_name(lexername, **parsed_opts)))
+
+    def _make_lexer(self, cls):
+        lexer = self.lexers.get(cls)
+        if lexer is None:
+            lexer = cls(**self.parsed_opts)
+            for fname, fopts in self.F_opts:
+                lexer.add_filter(fname, **fopts)
+            escapeinside = self.parsed_opts.get('escapeinside', '')
+            if len(escapeinside) == 2 and \
+               isinstance(self.formatter, LatexFormatter):
+                lexer = LatexEmbeddedLexer(escapeinside[0], escapeinside[1],
+                                           lexer)
+            self.lexers[cls] = lexer
+        return lexer
+
+    def _get_lexer(self, infn, code):
+        if self.lexer is not None:
+            return self.lexer
+        cls = find_lexer_class_for_filename(infn, code)
+        if cls is None:
+            if not self.guess:
+                raise ClassNotFound('no lexer for filename %r found' % infn)
+            try:
+                cls = type(guess_lexer(code))
+            except ClassNotFound:
+                cls = TextLexer
+        return self._make_lexer(cls)
+
+    def __call__(self, job):
+        """Highlight one file, return its name and an error message or None."""
+        infn, outfn = job
+        try:
+            with open(infn, 'rb') as infp:
+                code = rawcode = infp.read()
+            inencoding = self.inencoding
+            if not inencoding:
+                code, inencoding = guess_decode(code)
+            lexer = self._get_lexer(infn, code)
+            if isinstance(lexer, BinaryTokenLexer):
+                code = rawcode
+            if not self.outencoding:
+                # same as for a single output file
+                self.formatter.encoding = inencoding
+            outdir = os.path.dirname(outfn)
+            if outdir and not os.path.isdir(outdir):
+                try:
+                    os.makedirs(outdir)
+                except OSError:
+                    # another worker may have created it in the meantime
+                    if not os.path.isdir(outdir):
+                        raise
+            with open(outfn, 'wb') as outfile:
+                highlight(code, lexer, self.formatter, outfile)
+        except Exception as err:
+            return infn, '%s: %s' % (err.__class__.__name__, err)
+        return infn, None
+
+
+_batch_worker = None
+
+
+def _batch_init(*args):
+    global _batch_worker
+    _batch_worker = _BatchWorker(*args)
+
+
+def _batch_highlight(job):
+    return _batch_worker(job)
+
+
+def _main_batch(opts, args, parsed_opts, F_opts, usage):
+    outdir = opts.pop('-d')
+    fmtername = opts.pop('-f', None)
+    lexername = opts.pop('-l', None)
+    guess = opts.pop('-g', None) is not None
+    if not fmtername or '-o' in opts or '-s' in opts:
+        print(usage, file=sys.stderr)
+        return 2
+
+    try:
+        jobs = int(opts.pop('-j', 0))
+    except ValueError:
+        print(usage, file=sys.stderr)
+        return 2
+    if jobs <= 0:
+        try:
+            import multiprocessing
+            jobs = multiprocessing.cpu_count()
+        except (ImportError, NotImplementedError):
+            jobs = 1
+
+    infns = list(args)
+    manifest = opts.pop('-m', None)
+    if manifest is not None:
+        try:
+            if manifest == '-':
+                lines = sys.stdin.readlines()
+            else:
+                with open(manifest) as fp:
+                    lines = fp.readlines()
+        except Exception as err:
+            print('Error: cannot read manifest:', err, file=sys.stderr)
+            return 1
+        infns.extend(line.strip() for line in lines if line.strip())
+    if not infns:
+        print(usage, file=sys.stderr)
+        return 2
+
+    # check the options once here, not in every worker
+    try:
+        worker = _BatchWorker(lexername, guess, parsed_opts, F_opts,
+                              fmtername)
+    except (OptionError, ClassNotFound) as err:
+        print('Error:', err, file=sys.stderr)
+        return 1
+    pattern = (worker.formatter.filenames or ['*.out'])[0]
+    ext = pattern.startswith('*.') and pattern[1:] or '.out'
+
+    # output paths are relative to the common directory of all inputs
+    paths = [os.path.abspath(fn) for fn in infns]
+    base = os.path.commonprefix([os.path.dirname(path) + os.sep
+                                 for path in paths])
+    base = base[:base.rfind(os.sep) + 1]
+    todo = [(infn, os.path.join(outdir, path[len(base):] + ext))
+            for infn, path in zip(infns, paths)]
+
+    # the workers must not write the same file at once
+    seen = {}
+    for infn, outfn in todo:
+        key = os.path.normcase(os.path.abspath(outfn))
+        if key in seen:
+            print('Error: %s and %s would both be written to %s' %
+                  (seen[key], infn, outfn), file=sys.stderr)
+            return 2
+        seen[key] = infn
+
+    pool = None
+    if jobs == 1 or len(todo) == 1:
+        results = map(worker, todo)
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, _batch_init,
+                                    (lexername, guess, parsed_opts, F_opts,
+                                     fmtername))
+        chunksize = max(1, min(16, len(todo) // (jobs * 4)))
+        results = pool.imap_unordered(_batch_highlight, todo, chunksize)
+        pool.close()
+
+    failed = 0
+    for infn, err in results:
+        if err is not None:
+            print('Error: %s: %s' % (infn, err), file=sys.stderr)
+            failed += 1
+    if pool is not None:
+        pool.join()
+    return failed and 1 or 0
+
+
 def main(args=sys.argv):
     """
     Main command line entry point.
     """
-    usage = USAGE % ((args[0],) * 6)
+    usage = USAGE % ((args[0],) * 7)
 
     try:
-        popts, args = getopt.getopt(args[1:], "l:f:F:o:O:P:LS:a:N:vhVHgs")
+        popts, args = getopt.getopt(args[1:], "l:f:F:o:O:P:LS:a:N:d:j:m:vhVHgs")
     except getopt.GetoptError:
         print(usage, file=sys.stderr)
         return 2
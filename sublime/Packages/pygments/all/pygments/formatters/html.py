@@ -27,6 +27,8 @@ except ImportError:
 
 __all__ = ['HtmlFormatter']
 
+# number of characters collected before writing to the output file
+_write_chunk_size = 64 * 1024
 
 _escape_html_table = {
     ord('&'): u'&amp;',
@@ -710,18 +712,27 @@ class HtmlFormatter(Formatter):
         escape_table = _escape_html_table
         tagsfile = self.tagsfile
 
+        # span tags (and, with noclasses, the token type that has a style)
+        # by token type
+        spans = {}
+
         lspan = ''
-        line = ''
+        line = []
         for ttype, value in tokensource:
-            if nocls:
-                cclass = getcls(ttype)
-                while cclass is None:
-                    ttype = ttype.parent
+            try:
+                cspan, ttype = spans[ttype]
+            except KeyError:
+                key = ttype
+                if nocls:
                     cclass = getcls(ttype)
-                cspan = cclass and '<span style="%s">' % c2s[cclass][0] or ''
-            else:
-                cls = self._get_css_classes(ttype)
-                cspan = cls and '<span class="%s">' % cls or ''
+                    while cclass is None:
+                        ttype = ttype.parent
+                        cclass = getcls(ttype)
+                    cspan = cclass and '<span style="%s">' % c2s[cclass][0] or ''
+                else:
+                    cls = self._get_css_classes(ttype)
+                    cspan = cls and '<span class="%s">' % cls or ''
+                spans[key] = cspan, ttype
 
             parts = value.translate(escape_table).split('\n')
 
@@ -742,12 +753,12 @@ class HtmlFormatter(Formatter):
             for part in parts[:-1]:
                 if line:
                     if lspan != cspan:
-                        line += (lspan and '</span>') + cspan + part + \
-                                (cspan and '</span>') + lsep
+                        line += (lspan and '</span>', cspan, part,
+                                 cspan and '</span>', lsep)
                     else: # both are the same
-                        line += part + (lspan and '</span>') + lsep
-                    yield 1, line
-                    line = ''
+                        line += (part, lspan and '</span>', lsep)
+                    yield 1, ''.join(line)
+                    line = []
                 elif part:
                     yield 1, cspan + part + (cspan and '</span>') + lsep
                 else:
@@ -755,17 +766,17 @@ class HtmlFormatter(Formatter):
             # for the last line
             if line and parts[-1]:
                 if lspan != cspan:
-                    line += (lspan and '</span>') + cspan + parts[-1]
+                    line += (lspan and '</span>', cspan, parts[-1])
                     lspan = cspan
                 else:
-                    line += parts[-1]
+                    line.append(parts[-1])
             elif parts[-1]:
-                line = cspan + parts[-1]
+                line = [cspan, parts[-1]]
                 lspan = cspan
             # else we neither have to open a new span nor set lspan
 
         if line:
-            yield 1, line + (lspan and '</span>') + lsep
+            yield 1, ''.join(line) + (lspan and '</span>') + lsep
 
     def _lookup_ctag(self, token):
         entry = ctags.TagEntry()
@@ -834,5 +845,15 @@ class HtmlFormatter(Formatter):
             if self.full:
                 source = self._wrap_full(source, outfile)
 
+        # write in chunks rather than piece by piece
+        chunk = []
+        size = 0
         for t, piece in source:
-            outfile.write(piece)
+            chunk.append(piece)
+            size += len(piece)
+            if size >= _write_chunk_size:
+                outfile.write(''.join(chunk))
+                chunk = []
+                size = 0
+        if chunk:
+            outfile.write(''.join(chunk))
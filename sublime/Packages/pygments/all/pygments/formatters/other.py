@@ -3,7 +3,7 @@
     pygments.formatters.other
     ~~~~~~~~~~~~~~~~~~~~~~~~~
 
-    Other formatters: NullFormatter, RawTokenFormatter.
+    Other formatters: NullFormatter, RawTokenFormatter, BinaryTokenFormatter.
 
     :copyright: Copyright 2006-2015 by the Pygments team, see AUTHORS.
     :license: BSD, see LICENSE for details.
@@ -14,7 +14,8 @@ from pygments.util import OptionError, get_choice_opt
 from pygments.token import Token
 from pygments.console import colorize
 
-__all__ = ['NullFormatter', 'RawTokenFormatter', 'TestcaseFormatter']
+__all__ = ['NullFormatter', 'RawTokenFormatter', 'BinaryTokenFormatter',
+           'TestcaseFormatter']
 
 
 class NullFormatter(Formatter):
@@ -115,6 +116,103 @@ class RawTokenFormatter(Formatter):
                 write("%s\t%r\n" % (ttype, value))
         flush()
 
+
+#: First bytes of a binary token stream, the last one is the format version.
+BINARY_TOKENS_MAGIC = b'PYGTOK\x01'
+
+_small_varints = [bytes(bytearray([i])) for i in range(128)]
+
+
+def _varint(n):
+    """Encode a non-negative integer in 7-bit groups, low bits first."""
+    if n < 128:
+        return _small_varints[n]
+    buf = bytearray()
+    while n >= 128:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+    return bytes(buf)
+
+
+class BinaryTokenFormatter(Formatter):
+    r"""
+    Format tokens in a compact binary representation for storing token
+    streams.  The output can later be converted back to a token stream with
+    the `BinaryTokenLexer`, so that it can be formatted with any other
+    formatter without lexing the code again.
+
+    The stream starts with ``PYGTOK`` and a version byte.  Then follows one
+    record per token: the index of its token type and the length of its
+    UTF-8 encoded value as varints, followed by the value.  A token type is
+    defined by an index of 0 and its name before its first use, and gets
+    the next free index, starting at 1.
+
+    Only one option is accepted:
+
+    `compress`
+        If set to ``'gz'`` or ``'bz2'``, compress the output with the given
+        compression algorithm (default: ``''``).
+
+    .. versionadded:: 2.1
+    """
+    name = 'Binary tokens'
+    aliases = ['binarytokens', 'bintokens']
+    filenames = ['*.pygtok']
+
+    unicodeoutput = False
+
+    def __init__(self, **options):
+        Formatter.__init__(self, **options)
+        # the output is binary, see RawTokenFormatter
+        self.encoding = 'utf-8'
+        self.compress = get_choice_opt(options, 'compress',
+                                       ['', 'none', 'gz', 'bz2'], '')
+
+    def format(self, tokensource, outfile):
+        try:
+            outfile.write(b'')
+        except TypeError:
+            raise TypeError('The binary tokens formatter needs a binary '
+                            'output file')
+        if self.compress == 'gz':
+            import gzip
+            outfile = gzip.GzipFile('', 'wb', 9, outfile)
+            write = outfile.write
+            flush = outfile.flush
+        elif self.compress == 'bz2':
+            import bz2
+            compressor = bz2.BZ2Compressor(9)
+            def write(data):
+                outfile.write(compressor.compress(data))
+            def flush():
+                outfile.write(compressor.flush())
+                outfile.flush()
+        else:
+            write = outfile.write
+            flush = outfile.flush
+
+        varint = _varint
+        indexes = {}
+        chunk = [BINARY_TOKENS_MAGIC]
+        size = 0
+        for ttype, value in tokensource:
+            index = indexes.get(ttype)
+            if index is None:
+                index = indexes[ttype] = len(indexes) + 1
+                name = str(ttype).encode('ascii')
+                chunk += (b'\0', varint(len(name)), name)
+            value = value.encode('utf-8')
+            chunk += (varint(index), varint(len(value)), value)
+            size += len(value)
+            if size >= 65536:
+                write(b''.join(chunk))
+                chunk = []
+                size = 0
+        write(b''.join(chunk))
+        flush()
+
+
 TESTCASE_BEFORE = u'''\
     def testNeedsName(self):
         fragment = %r
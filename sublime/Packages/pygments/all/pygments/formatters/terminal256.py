@@ -31,6 +31,109 @@ from pygments.formatter import Formatter
 
 __all__ = ['Terminal256Formatter']
 
+# levels of the 6x6x6 color cube
+_cube_levels = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+
+def _build_color_table():
+    # colors 0..15: 16 basic colors
+
+    xterm_colors = [
+        (0x00, 0x00, 0x00),  # 0
+        (0xcd, 0x00, 0x00),  # 1
+        (0x00, 0xcd, 0x00),  # 2
+        (0xcd, 0xcd, 0x00),  # 3
+        (0x00, 0x00, 0xee),  # 4
+        (0xcd, 0x00, 0xcd),  # 5
+        (0x00, 0xcd, 0xcd),  # 6
+        (0xe5, 0xe5, 0xe5),  # 7
+        (0x7f, 0x7f, 0x7f),  # 8
+        (0xff, 0x00, 0x00),  # 9
+        (0x00, 0xff, 0x00),  # 10
+        (0xff, 0xff, 0x00),  # 11
+        (0x5c, 0x5c, 0xff),  # 12
+        (0xff, 0x00, 0xff),  # 13
+        (0x00, 0xff, 0xff),  # 14
+        (0xff, 0xff, 0xff),  # 15
+    ]
+
+    # colors 16..232: the 6x6x6 color cube
+
+    for i in range(217):
+        r = _cube_levels[(i // 36) % 6]
+        g = _cube_levels[(i // 6) % 6]
+        b = _cube_levels[i % 6]
+        xterm_colors.append((r, g, b))
+
+    # colors 233..253: grayscale
+
+    for i in range(1, 22):
+        v = 8 + i * 10
+        xterm_colors.append((v, v, v))
+
+    return xterm_colors
+
+
+def _closest_level(v):
+    """Return the index of the color cube level closest to `v`, the lower
+    one on a tie."""
+    i = 0
+    while i < 5 and (_cube_levels[i + 1] - v) < (v - _cube_levels[i]):
+        i += 1
+    return i
+
+
+def _closest_xterm_color(r, g, b):
+    """
+    Return the index of the color in `_xterm_colors` closest to (r, g, b),
+    the lowest index on a tie.  Instead of comparing all colors, the
+    closest cube color is found per channel and the closest gray from the
+    mean of the channels.
+    """
+    distance = 257*257*3  # "infinity" (>distance from #000000 to #ffffff)
+    match = 0
+
+    for i in range(16):
+        values = _xterm_colors[i]
+        rd = r - values[0]
+        gd = g - values[1]
+        bd = b - values[2]
+        d = rd*rd + gd*gd + bd*bd
+        if d < distance:
+            match = i
+            distance = d
+
+    i = 16 + 36 * _closest_level(r) + 6 * _closest_level(g) + _closest_level(b)
+    values = _xterm_colors[i]
+    rd = r - values[0]
+    gd = g - values[1]
+    bd = b - values[2]
+    d = rd*rd + gd*gd + bd*bd
+    if d < distance:
+        match = i
+        distance = d
+
+    # the gray ramp goes from 18 to 218 in steps of 10; the two grays
+    # around the mean are the only candidates
+    mean = (r + g + b) / 3.0
+    step = min(max(int((mean - 18) // 10), 0), 20)
+    for i in range(233 + step, min(235 + step, 254)):
+        values = _xterm_colors[i]
+        rd = r - values[0]
+        gd = g - values[1]
+        bd = b - values[2]
+        d = rd*rd + gd*gd + bd*bd
+        if d < distance:
+            match = i
+            distance = d
+    return match
+
+
+# the xterm 256-color table (colors 254 and 255 aren't used)
+_xterm_colors = _build_color_table()
+
+# closest color index by style color, shared by all formatters
+_best_match = {}
+
 
 class EscapeSequence:
     def __init__(self, fg=None, bg=None, bold=False, underline=False):
@@ -93,7 +196,7 @@ class Terminal256Formatter(Formatter):
         Formatter.__init__(self, **options)
 
         self.xterm_colors = []
-        self.best_match = {}
+        self.best_match = _best_match
         self.style_string = {}
 
         self.usebold = 'nobold' not in options
@@ -103,57 +206,10 @@ class Terminal256Formatter(Formatter):
         self._setup_styles()  # convert selected style's colors to term. colors
 
     def _build_color_table(self):
-        # colors 0..15: 16 basic colors
-
-        self.xterm_colors.append((0x00, 0x00, 0x00))  # 0
-        self.xterm_colors.append((0xcd, 0x00, 0x00))  # 1
-        self.xterm_colors.append((0x00, 0xcd, 0x00))  # 2
-        self.xterm_colors.append((0xcd, 0xcd, 0x00))  # 3
-        self.xterm_colors.append((0x00, 0x00, 0xee))  # 4
-        self.xterm_colors.append((0xcd, 0x00, 0xcd))  # 5
-        self.xterm_colors.append((0x00, 0xcd, 0xcd))  # 6
-        self.xterm_colors.append((0xe5, 0xe5, 0xe5))  # 7
-        self.xterm_colors.append((0x7f, 0x7f, 0x7f))  # 8
-        self.xterm_colors.append((0xff, 0x00, 0x00))  # 9
-        self.xterm_colors.append((0x00, 0xff, 0x00))  # 10
-        self.xterm_colors.append((0xff, 0xff, 0x00))  # 11
-        self.xterm_colors.append((0x5c, 0x5c, 0xff))  # 12
-        self.xterm_colors.append((0xff, 0x00, 0xff))  # 13
-        self.xterm_colors.append((0x00, 0xff, 0xff))  # 14
-        self.xterm_colors.append((0xff, 0xff, 0xff))  # 15
-
-        # colors 16..232: the 6x6x6 color cube
-
-        valuerange = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
-
-        for i in range(217):
-            r = valuerange[(i // 36) % 6]
-            g = valuerange[(i // 6) % 6]
-            b = valuerange[i % 6]
-            self.xterm_colors.append((r, g, b))
-
-        # colors 233..253: grayscale
-
-        for i in range(1, 22):
-            v = 8 + i * 10
-            self.xterm_colors.append((v, v, v))
+        self.xterm_colors.extend(_xterm_colors)
 
     def _closest_color(self, r, g, b):
-        distance = 257*257*3  # "infinity" (>distance from #000000 to #ffffff)
-        match = 0
-
-        for i in range(0, 254):
-            values = self.xterm_colors[i]
-
-            rd = r - values[0]
-            gd = g - values[1]
-            bd = b - values[2]
-            d = rd*rd + gd*gd + bd*bd
-
-            if d < distance:
-                match = i
-                distance = d
-        return match
+        return _closest_xterm_color(r, g, b)
 
     def _color_index(self, color):
         index = self.best_match.get(color, None)
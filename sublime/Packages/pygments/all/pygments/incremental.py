@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+    pygments.incremental
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Incremental re-lexing of edited text for `RegexLexer` and
+    `ExtendedRegexLexer` based lexers.
+
+    :copyright: Copyright 2006-2015 by the Pygments team, see AUTHORS.
+    :license: BSD, see LICENSE for details.
+"""
+
+from bisect import bisect_left
+
+from pygments.lexer import RegexLexer, ExtendedRegexLexer, LexerContext, \
+    _apply_new_state
+from pygments.token import Error, Text, _TokenType
+
+__all__ = ['IncrementalLexer']
+
+
+def _lexer_loop(lexer):
+    """Return the class whose lexing loop `lexer` uses."""
+    for cls in type(lexer).__mro__:
+        if 'get_tokens_unprocessed' in cls.__dict__:
+            return cls
+
+
+def _regex_lex(lexer, text, pos, state):
+    """
+    The lexing loop of `RegexLexer`, started at `pos` with the given state
+    stack.  Yields ``(index, tokentype, value)`` tuples as usual, and a
+    ``(index, None, state)`` checkpoint whenever the loop is about to
+    match at the start of a line.
+    """
+    tokendefs = lexer._tokens
+    statestack = list(state)
+    statetokens = tokendefs[statestack[-1]]
+    checkpoint = -1
+    while 1:
+        if pos != checkpoint and (pos == 0 or text[pos - 1:pos] == '\n'):
+            checkpoint = pos
+            yield pos, None, tuple(statestack)
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group()
+                    else:
+                        for item in action(lexer, m):
+                            yield item
+                pos = m.end()
+                if new_state is not None:
+                    # state transition
+                    _apply_new_state(statestack, new_state)
+                    statetokens = tokendefs[statestack[-1]]
+                break
+        else:
+            try:
+                if text[pos] == '\n':
+                    # at EOL, reset state to "root"
+                    statestack = ['root']
+                    statetokens = tokendefs['root']
+                    yield pos, Text, u'\n'
+                    pos += 1
+                    continue
+                yield pos, Error, text[pos]
+                pos += 1
+            except IndexError:
+                break
+
+
+def _context_state(ctx):
+    extra = dict((k, v) for k, v in ctx.__dict__.items()
+                 if k not in ('text', 'pos', 'end', 'stack'))
+    return tuple(ctx.stack), extra
+
+
+def _extended_lex(lexer, text, pos, state):
+    """
+    Like `_regex_lex`, but for the lexing loop of `ExtendedRegexLexer`.
+    The checkpointed state also holds any extra attributes callbacks
+    stored on the `LexerContext`.
+    """
+    tokendefs = lexer._tokens
+    ctx = LexerContext(text, pos, list(state[0]))
+    ctx.__dict__.update(state[1])
+    statetokens = tokendefs[ctx.stack[-1]]
+    checkpoint = -1
+    while 1:
+        if ctx.pos != checkpoint and \
+                (ctx.pos == 0 or text[ctx.pos - 1:ctx.pos] == '\n'):
+            checkpoint = ctx.pos
+            yield ctx.pos, None, _context_state(ctx)
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, ctx.pos, ctx.end)
+            if m:
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield ctx.pos, action, m.group()
+                        ctx.pos = m.end()
+                    else:
+                        for item in action(lexer, m, ctx):
+                            yield item
+                        if not new_state:
+                            # altered the state stack?
+                            statetokens = tokendefs[ctx.stack[-1]]
+                # CAUTION: callback must set ctx.pos!
+                if new_state is not None:
+                    # state transition
+                    _apply_new_state(ctx.stack, new_state)
+                    statetokens = tokendefs[ctx.stack[-1]]
+                break
+        else:
+            try:
+                if ctx.pos >= ctx.end:
+                    break
+                if text[ctx.pos] == '\n':
+                    # at EOL, reset state to "root"
+                    ctx.stack = ['root']
+                    statetokens = tokendefs['root']
+                    yield ctx.pos, Text, u'\n'
+                    ctx.pos += 1
+                    continue
+                yield ctx.pos, Error, text[ctx.pos]
+                ctx.pos += 1
+            except IndexError:
+                break
+
+
+class IncrementalLexer(object):
+    """
+    Keeps the token stream of a text up to date while the text is edited.
+
+    While lexing, the lexer state is saved at the start of every line.
+    After an edit, lexing resumes from the last saved state before the
+    edit, and stops as soon as it reaches a line start past the edit
+    where the state is the same as in the previous run; the tokens from
+    there on are reused.  The cost of an update therefore depends on the
+    size of the edit and not on the size of the text.
+
+    Tokens before the resumption point are assumed not to depend on the
+    text after the edit.  This does not hold for rules that look far
+    ahead: e.g. an unterminated string literal that is lexed as an error
+    only because its closing quote is missing several lines below.  If
+    an edit adds such a terminator, the tokens before it are not updated;
+    lex the text again from scratch when exact results are required.
+
+    This works on the level of `get_tokens_unprocessed`: the text is not
+    preprocessed and filters are not applied.  Lexers that override
+    `get_tokens_unprocessed` are supported, but are re-lexed completely
+    on every update.
+
+    .. versionadded:: 2.1
+    """
+
+    def __init__(self, lexer, text=u''):
+        self.lexer = lexer
+        loop = _lexer_loop(lexer)
+        if loop is RegexLexer:
+            self._lex = _regex_lex
+            self._root = ('root',)
+        elif loop is ExtendedRegexLexer:
+            self._lex = _extended_lex
+            self._root = (('root',), {})
+        else:
+            self._lex = None
+        self.text = u''
+        self._tokens = []
+        # The line start checkpoints as parallel lists of text positions,
+        # token numbers and states.  The positions and token numbers from
+        # index ``self._gap`` on are stored without the shift of the edits
+        # since they were made, ``self._shift``; this is applied lazily,
+        # when the checkpoints are needed, so that an update costs as much
+        # as the lines it has to lex and not as much as the whole text.
+        self._positions = []
+        self._tokennums = []
+        self._states = []
+        self._gap = 0
+        self._shift = (0, 0)
+        self.update(0, 0, text)
+
+    def _move_gap(self, index):
+        """Make the checkpoints before `index` exact, and no others."""
+        positions, tokennums = self._positions, self._tokennums
+        dpos, dtok = self._shift
+        if index > self._gap:
+            for i in range(self._gap, index):
+                positions[i] += dpos
+                tokennums[i] += dtok
+        else:
+            for i in range(index, self._gap):
+                positions[i] -= dpos
+                tokennums[i] -= dtok
+        self._gap = index
+
+    def _find(self, pos):
+        """Return the index of the first checkpoint at or after `pos`."""
+        positions, gap = self._positions, self._gap
+        if gap and positions[gap - 1] >= pos:
+            return bisect_left(positions, pos, 0, gap)
+        return bisect_left(positions, pos - self._shift[0], gap)
+
+    def get_tokens(self):
+        """
+        Return the current list of ``(index, tokentype, value)`` tuples.
+        """
+        tokens = []
+        pos = 0
+        for tokentype, value in self._tokens:
+            tokens.append((pos, tokentype, value))
+            pos += len(value)
+        return tokens
+
+    def update(self, start, end, text):
+        """
+        Replace ``self.text[start:end]`` by `text` and re-lex as much as
+        needed.
+
+        Returns a ``(first, last, tokens)`` triple: the tokens ``first`` up
+        to (not including) ``last`` of the previous token list have been
+        replaced by `tokens`, a list of ``(index, tokentype, value)``
+        tuples.  The indexes of all tokens after them are shifted by
+        ``len(text) - (end - start)``.
+        """
+        old = self.text
+        self.text = new = old[:start] + text + old[end:]
+        delta = len(text) - (end - start)
+        if self._lex is None:
+            tokens = list(self.lexer.get_tokens_unprocessed(new))
+            first, last = 0, len(self._tokens)
+            self._tokens = [(t, v) for i, t, v in tokens]
+            return first, last, tokens
+
+        # resume one line before the edit, in case the last token on it
+        # looked ahead into the edited part
+        index = max(self._find(start) - 2, 0)
+        # from here on, all checkpoints are stored without their shift
+        self._move_gap(index)
+        dpos, dtok = self._shift
+        if index < len(self._positions):
+            pos, first, state = (self._positions[index] + dpos,
+                                 self._tokennums[index] + dtok,
+                                 self._states[index])
+        else:
+            pos, first, state = 0, 0, self._root
+        tokens = []
+        positions = []
+        tokennums = []
+        states = []
+        last = len(self._tokens)
+        stop = len(self._positions)
+        edited = start + len(text)
+        for tpos, tokentype, value in self._lex(self.lexer, new, pos, state):
+            if tokentype is not None:
+                tokens.append((tpos, tokentype, value))
+                continue
+            if tpos >= edited and tpos > start:
+                # past the edit: compare with the previous run
+                j = bisect_left(self._positions, tpos - delta - dpos, index)
+                if j < len(self._positions) and \
+                        self._positions[j] == tpos - delta - dpos and \
+                        self._states[j] == value:
+                    last = self._tokennums[j] + dtok
+                    stop = j
+                    break
+            positions.append(tpos)
+            tokennums.append(first + len(tokens))
+            states.append(value)
+
+        # the new checkpoints are exact, the ones after them get the shift
+        # of this edit too
+        shift = len(tokens) - (last - first)
+        self._positions[index:stop] = positions
+        self._tokennums[index:stop] = tokennums
+        self._states[index:stop] = states
+        self._gap = index + len(positions)
+        self._shift = (dpos + delta, dtok + shift)
+        self._tokens[first:last] = [(t, v) for i, t, v in tokens]
+        return first, last, tokens
@@ -15,13 +15,15 @@ import re
 import sys
 import time
 import itertools
+import threading
 
 from pygments.filter import apply_filters, Filter
 from pygments.filters import get_filter_by_name
 from pygments.token import Error, Text, Other, _TokenType
 from pygments.util import get_bool_opt, get_int_opt, get_list_opt, \
-    make_analysator, text_type, add_metaclass, iteritems, Future, guess_decode
+    get_float_opt, make_analysator, text_type, add_metaclass, iteritems, Future, guess_decode
 from pygments.regexopt import regex_opt
+from pygments import tokencache
 
 __all__ = ['Lexer', 'RegexLexer', 'ExtendedRegexLexer', 'DelegatingLexer',
            'LexerContext', 'include', 'inherit', 'bygroups', 'using', 'this',
@@ -36,6 +38,43 @@ _encoding_map = [(b'\xef\xbb\xbf', 'utf-8'),
 
 _default_analyse = staticmethod(lambda x: 0.0)
 
+# rules whose regex refers to groups by number or name, or sets global
+# flags inline, can't be merged
+_unmergeable_re = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[aiLmsux]+\)')
+
+# merged rule tables, keyed by id() of the processed state token list
+_compiled_states = {}
+
+# timer for the timeout options
+_clock = getattr(time, 'perf_counter', time.time)
+
+# held while the token definitions of a class are processed, which hands
+# the token cache to _process_regex in a class attribute
+_process_lock = threading.RLock()
+
+
+def _apply_new_state(statestack, new_state):
+    """
+    Apply the processed ``new_state`` of a rule (a tuple of states, a
+    negative int to pop, or ``'#push'``) to the list `statestack` in place.
+    Shared by all lexing loops of `RegexLexer` and `ExtendedRegexLexer`.
+    """
+    if isinstance(new_state, tuple):
+        for state in new_state:
+            if state == '#pop':
+                statestack.pop()
+            elif state == '#push':
+                statestack.append(statestack[-1])
+            else:
+                statestack.append(state)
+    elif isinstance(new_state, int):
+        # pop
+        del statestack[new_state:]
+    elif new_state == '#push':
+        statestack.append(statestack[-1])
+    else:
+        assert False, "wrong state def: %r" % new_state
+
 
 class LexerMeta(type):
     """
@@ -404,6 +443,9 @@ class words(Future):
     Indicates a list of literal words that is transformed into an optimized
     regex that matches any of the words.
 
+    Instead of a list, a function returning one may be given, so that large
+    word lists are only loaded when the lexer is first used.
+
     .. versionadded:: 2.0
     """
     def __init__(self, words, prefix='', suffix=''):
@@ -411,8 +453,14 @@ class words(Future):
         self.prefix = prefix
         self.suffix = suffix
 
+    def get_words(self):
+        if callable(self.words):
+            return self.words()
+        return self.words
+
     def get(self):
-        return regex_opt(self.words, prefix=self.prefix, suffix=self.suffix)
+        return regex_opt(self.get_words(), prefix=self.prefix,
+                         suffix=self.suffix)
 
 
 class RegexLexerMeta(LexerMeta):
@@ -423,6 +471,9 @@ class RegexLexerMeta(LexerMeta):
 
     def _process_regex(cls, regex, rflags, state):
         """Preprocess the regular expression component of a token definition."""
+        cache = cls.__dict__.get('_tokencache')
+        if cache is not None:
+            return cache.compile(regex, rflags).match
         if isinstance(regex, Future):
             regex = regex.get()
         return re.compile(regex, rflags).match
@@ -569,16 +620,76 @@ class RegexLexerMeta(LexerMeta):
 
         return tokens
 
+    def _merge_rules(cls, rules, flags):
+        """
+        Merge a run of rules into a single alternation regex.  Every rule is
+        wrapped in its own group, so ``lastindex`` of a match identifies
+        the rule that won.
+        """
+        if len(rules) == 1:
+            return rules[0][0], rules[0], None
+        parts = []
+        table = {}
+        index = 1
+        for rule in rules:
+            regex = rule[0].__self__
+            parts.append('(%s)' % regex.pattern)
+            table[index] = rule
+            index += regex.groups + 1
+        try:
+            rex = re.compile('|'.join(parts), flags).match
+        except Exception:
+            return None
+        return rex, None, table
+
+    def _compile_state(cls, statetokens):
+        """
+        Build the compiled form of a processed state for the ``compiled``
+        lexer option: runs of consecutive rules are merged into one regex,
+        rules that can't be merged are kept as they are.
+        """
+        flags = re.compile('', cls.flags).flags
+        segments = []
+        run = []
+        for rule in statetokens + [None]:
+            regex = getattr(rule and rule[0], '__self__', None)
+            if regex is not None and not (flags & re.VERBOSE) and (
+                    regex.pattern == '' or regex.flags == flags) and \
+                    not _unmergeable_re.search(regex.pattern):
+                run.append(rule)
+                continue
+            if run:
+                merged = cls._merge_rules(run, flags)
+                if merged is None:
+                    segments.extend((r[0], r, None) for r in run)
+                else:
+                    segments.append(merged)
+                run = []
+            if rule is not None:
+                segments.append((rule[0], rule, None))
+        _compiled_states[id(statetokens)] = (statetokens, segments)
+        return segments
+
     def __call__(cls, *args, **kwds):
         """Instantiate cls after preprocessing its token definitions."""
         if '_tokens' not in cls.__dict__:
-            cls._all_tokens = {}
-            cls._tmpname = 0
-            if hasattr(cls, 'token_variants') and cls.token_variants:
-                # don't process yet
-                pass
-            else:
-                cls._tokens = cls.process_tokendef('', cls.get_tokendefs())
+            with _process_lock:
+                # another thread may have processed them in the meantime
+                if '_tokens' not in cls.__dict__:
+                    cls._all_tokens = {}
+                    cls._tmpname = 0
+                    if hasattr(cls, 'token_variants') and cls.token_variants:
+                        # don't process yet
+                        pass
+                    else:
+                        cache = cls._tokencache = tokencache.load(cls)
+                        try:
+                            cls._tokens = cls.process_tokendef(
+                                '', cls.get_tokendefs())
+                        finally:
+                            del cls._tokencache
+                        if cache is not None:
+                            cache.save()
 
         return type.__call__(cls, *args, **kwds)
 
@@ -589,6 +700,38 @@ class RegexLexer(Lexer):
     Base for simple stateful regular expression-based lexers.
     Simplifies the lexing process so that you need only
     provide a list of states and regular expressions.
+
+    Options recognized in addition to the basic `Lexer` options:
+
+    ``compiled``
+        If set to true, consecutive rules of a state are merged into a
+        single regular expression the first time the state is entered, so
+        that finding the matching rule takes one regex call instead of one
+        per rule.  Rules that can't be merged (e.g. because they use
+        backreferences) are tried on their own.  The token stream is the
+        same as without this option (default: False).
+
+        .. versionadded:: 2.1
+
+    ``timeout``
+        If given and greater than 0, the maximum number of seconds to spend
+        lexing one input.  When it is exceeded, the rest of the input is
+        returned as a single `Text` token, and the rule that was being
+        tried is recorded in `timed_out` (default: 0).
+
+        .. versionadded:: 2.1
+
+    ``ruletimeout``
+        Like ``timeout``, but for a single attempt to match a rule, to stop
+        at the first sign of catastrophic backtracking (default: 0).
+
+        Note that a regex match can't be interrupted: the limits are checked
+        after each match attempt, so a single pathological match still runs
+        to completion.  Timing every match attempt makes lexing slower.
+        Both options take precedence over ``compiled``, and are ignored by
+        `ExtendedRegexLexer`.
+
+        .. versionadded:: 2.1
     """
 
     #: Flags for compiling the regular expressions.
@@ -614,12 +757,27 @@ class RegexLexer(Lexer):
     #: current one.
     tokens = {}
 
+    #: After lexing with the ``timeout`` or ``ruletimeout`` option, None if
+    #: the input was lexed completely, else a ``(state, regex, pos,
+    #: seconds)`` tuple: the rule that was tried when the time ran out, the
+    #: position at which the rest of the input was given up, and the time
+    #: spent in that rule so far.
+    timed_out = None
+
     def get_tokens_unprocessed(self, text, stack=('root',)):
         """
         Split ``text`` into (tokentype, text) pairs.
 
         ``stack`` is the inital stack (default: ``['root']``)
         """
+        if self.options.get('timeout') or self.options.get('ruletimeout'):
+            for item in self._get_tokens_guarded(text, stack):
+                yield item
+            return
+        if get_bool_opt(self.options, 'compiled', False):
+            for item in self._get_tokens_compiled(text, stack):
+                yield item
+            return
         pos = 0
         tokendefs = self._tokens
         statestack = list(stack)
@@ -637,21 +795,68 @@ class RegexLexer(Lexer):
                     pos = m.end()
                     if new_state is not None:
                         # state transition
-                        if isinstance(new_state, tuple):
-                            for state in new_state:
-                                if state == '#pop':
-                                    statestack.pop()
-                                elif state == '#push':
-                                    statestack.append(statestack[-1])
-                                else:
-                                    statestack.append(state)
-                        elif isinstance(new_state, int):
-                            # pop
-                            del statestack[new_state:]
-                        elif new_state == '#push':
-                            statestack.append(statestack[-1])
+                        _apply_new_state(statestack, new_state)
+                        statetokens = tokendefs[statestack[-1]]
+                    break
+            else:
+                try:
+                    if text[pos] == '\n':
+                        # at EOL, reset state to "root"
+                        statestack = ['root']
+                        statetokens = tokendefs['root']
+                        yield pos, Text, u'\n'
+                        pos += 1
+                        continue
+                    yield pos, Error, text[pos]
+                    pos += 1
+                except IndexError:
+                    break
+
+    def _get_tokens_guarded(self, text, stack):
+        """
+        Same as `get_tokens_unprocessed`, but gives up when the
+        ``timeout`` or ``ruletimeout`` option is exceeded.
+
+        .. versionadded:: 2.1
+        """
+        timeout = get_float_opt(self.options, 'timeout', 0) or float('inf')
+        ruletimeout = get_float_opt(self.options, 'ruletimeout', 0) or \
+            float('inf')
+        clock = _clock
+        self.timed_out = None
+        # only the time spent matching counts, not the time the consumer
+        # of the tokens takes
+        used = 0
+        pos = 0
+        tokendefs = self._tokens
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+        while 1:
+            t0 = clock()
+            for rexmatch, action, new_state in statetokens:
+                m = rexmatch(text, pos)
+                t1 = clock()
+                spent = t1 - t0
+                used += spent
+                if spent > ruletimeout or used > timeout:
+                    self.timed_out = (statestack[-1],
+                                      getattr(rexmatch, '__self__', None) and
+                                      rexmatch.__self__.pattern, pos, spent)
+                    if pos < len(text):
+                        yield pos, Text, text[pos:]
+                    return
+                t0 = t1
+                if m:
+                    if action is not None:
+                        if type(action) is _TokenType:
+                            yield pos, action, m.group()
                         else:
-                            assert False, "wrong state def: %r" % new_state
+                            for item in action(self, m):
+                                yield item
+                    pos = m.end()
+                    if new_state is not None:
+                        # state transition
+                        _apply_new_state(statestack, new_state)
                         statetokens = tokendefs[statestack[-1]]
                     break
             else:
@@ -668,6 +873,60 @@ class RegexLexer(Lexer):
                 except IndexError:
                     break
 
+    def _get_tokens_compiled(self, text, stack):
+        """
+        Same as `get_tokens_unprocessed`, but uses the merged rule tables
+        built by `RegexLexerMeta._compile_state` so that most states need
+        only one regex call per token.
+
+        .. versionadded:: 2.1
+        """
+        pos = 0
+        tokendefs = self._tokens
+        statestack = list(stack)
+
+        def segments_for(statetokens):
+            try:
+                return _compiled_states[id(statetokens)][1]
+            except KeyError:
+                return self.__class__._compile_state(statetokens)
+
+        segments = segments_for(tokendefs[statestack[-1]])
+        while 1:
+            for rexmatch, rule, table in segments:
+                m = rexmatch(text, pos)
+                if m:
+                    if table is not None:
+                        rule = table[m.lastindex]
+                    action, new_state = rule[1], rule[2]
+                    if action is not None:
+                        if type(action) is _TokenType:
+                            yield pos, action, m.group()
+                        else:
+                            if table is not None:
+                                m = rule[0](text, pos)
+                            for item in action(self, m):
+                                yield item
+                    pos = m.end()
+                    if new_state is not None:
+                        # state transition
+                        _apply_new_state(statestack, new_state)
+                        segments = segments_for(tokendefs[statestack[-1]])
+                    break
+            else:
+                try:
+                    if text[pos] == '\n':
+                        # at EOL, reset state to "root"
+                        statestack = ['root']
+                        segments = segments_for(tokendefs['root'])
+                        yield pos, Text, u'\n'
+                        pos += 1
+                        continue
+                    yield pos, Error, text[pos]
+                    pos += 1
+                except IndexError:
+                    break
+
 
 class LexerContext(object):
     """
@@ -720,21 +979,7 @@ class ExtendedRegexLexer(RegexLexer):
                     # CAUTION: callback must set ctx.pos!
                     if new_state is not None:
                         # state transition
-                        if isinstance(new_state, tuple):
-                            for state in new_state:
-                                if state == '#pop':
-                                    ctx.stack.pop()
-                                elif state == '#push':
-                                    ctx.stack.append(ctx.stack[-1])
-                                else:
-                                    ctx.stack.append(state)
-                        elif isinstance(new_state, int):
-                            # pop
-                            del ctx.stack[new_state:]
-                        elif new_state == '#push':
-                            ctx.stack.append(ctx.stack[-1])
-                        else:
-                            assert False, "wrong state def: %r" % new_state
+                        _apply_new_state(ctx.stack, new_state)
                         statetokens = tokendefs[ctx.stack[-1]]
                     break
             else:
@@ -822,7 +1067,7 @@ class ProfilingRegexLexerMeta(RegexLexerMeta):
 
     def _process_regex(cls, regex, rflags, state):
         if isinstance(regex, words):
-            rex = regex_opt(regex.words, prefix=regex.prefix,
+            rex = regex_opt(regex.get_words(), prefix=regex.prefix,
                             suffix=regex.suffix)
         else:
             rex = regex
@@ -830,9 +1075,9 @@ class ProfilingRegexLexerMeta(RegexLexerMeta):
 
         def match_func(text, pos, endpos=sys.maxsize):
             info = cls._prof_data[-1].setdefault((state, rex), [0, 0.0])
-            t0 = time.time()
+            t0 = _clock()
             res = compiled.match(text, pos, endpos)
-            t1 = time.time()
+            t1 = _clock()
             info[0] += 1
             info[1] += t1 - t0
             return res
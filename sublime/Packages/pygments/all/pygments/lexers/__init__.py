@@ -13,19 +13,23 @@ import re
 import sys
 import types
 import fnmatch
+import threading
 from os.path import basename
 
-from pygments.lexers._mapping import LEXERS
+from pygments.lexers._mapping import LEXERS, ANALYSERS, ALIAS_FILENAMES
 from pygments.modeline import get_filetype_from_buffer
 from pygments.plugin import find_plugin_lexers
-from pygments.util import ClassNotFound, itervalues, guess_decode
+from pygments.util import ClassNotFound, itervalues, guess_decode, \
+    split_path_re, html_doctype_matches, looks_like_xml
 
 
 __all__ = ['get_lexer_by_name', 'get_lexer_for_filename', 'find_lexer_class',
-           'guess_lexer'] + list(LEXERS)
+           'guess_lexer', 'guess_lexer_fast'] + list(LEXERS)
 
 _lexer_cache = {}
 _pattern_cache = {}
+_lexer_index = None
+_glob_chars = re.compile(r'[*?[]')
 
 
 def _fn_matches(fn, glob):
@@ -36,6 +40,41 @@ def _fn_matches(fn, glob):
     return _pattern_cache[glob].match(fn)
 
 
+def _get_lexer_index():
+    """Return lookup tables for the builtin lexers, built from `LEXERS`.
+
+    The first three map names, aliases and mimetypes to ``(module_name,
+    name)`` of the first lexer in `LEXERS` that has them.  Filename
+    patterns are split into literal filenames and ``*.ext`` patterns, both
+    mapped to lists of ``(order, module_name, name, pattern)`` entries, and
+    a list of all other patterns; ``order`` is the position of the pattern
+    in `LEXERS`.
+    """
+    global _lexer_index
+    if _lexer_index is None:
+        names, aliases, mimetypes = {}, {}, {}
+        filenames, extensions, patterns = {}, {}, []
+        for i, info in enumerate(itervalues(LEXERS)):
+            module_name, name = info[:2]
+            names.setdefault(name, (module_name, name))
+            for alias in info[2]:
+                aliases.setdefault(alias, (module_name, name))
+            for mimetype in info[4]:
+                mimetypes.setdefault(mimetype, (module_name, name))
+            for j, filename in enumerate(info[3]):
+                entry = ((i, j), module_name, name, filename)
+                if not _glob_chars.search(filename):
+                    filenames.setdefault(filename, []).append(entry)
+                elif filename[:2] == '*.' and \
+                        not _glob_chars.search(filename[1:]):
+                    extensions.setdefault(filename[1:], []).append(entry)
+                else:
+                    patterns.append(entry)
+        _lexer_index = (names, aliases, mimetypes,
+                        filenames, extensions, patterns)
+    return _lexer_index
+
+
 def _load_lexers(module_name):
     """Load a lexer (and all others in the module too)."""
     mod = __import__(module_name, None, None, ['__all__'])
@@ -62,10 +101,10 @@ def find_lexer_class(name):
     if name in _lexer_cache:
         return _lexer_cache[name]
     # lookup builtin lexers
-    for module_name, lname, aliases, _, _ in itervalues(LEXERS):
-        if name == lname:
-            _load_lexers(module_name)
-            return _lexer_cache[name]
+    info = _get_lexer_index()[0].get(name)
+    if info:
+        _load_lexers(info[0])
+        return _lexer_cache[name]
     # continue with lexers from setuptools entrypoints
     for cls in find_plugin_lexers():
         if cls.name == name:
@@ -81,11 +120,12 @@ def get_lexer_by_name(_alias, **options):
         raise ClassNotFound('no lexer for alias %r found' % _alias)
 
     # lookup builtin lexers
-    for module_name, name, aliases, _, _ in itervalues(LEXERS):
-        if _alias.lower() in aliases:
-            if name not in _lexer_cache:
-                _load_lexers(module_name)
-            return _lexer_cache[name](**options)
+    info = _get_lexer_index()[1].get(_alias.lower())
+    if info:
+        module_name, name = info
+        if name not in _lexer_cache:
+            _load_lexers(module_name)
+        return _lexer_cache[name](**options)
     # continue with lexers from setuptools entrypoints
     for cls in find_plugin_lexers():
         if _alias.lower() in cls.aliases:
@@ -103,12 +143,19 @@ def find_lexer_class_for_filename(_fn, code=None):
     """
     matches = []
     fn = basename(_fn)
-    for modname, name, _, filenames, _ in itervalues(LEXERS):
-        for filename in filenames:
-            if _fn_matches(fn, filename):
-                if name not in _lexer_cache:
-                    _load_lexers(modname)
-                matches.append((_lexer_cache[name], filename))
+    _, _, _, filenames, extensions, patterns = _get_lexer_index()
+    found = list(filenames.get(fn, ()))
+    dot = fn.find('.')
+    while dot != -1:
+        found.extend(extensions.get(fn[dot:], ()))
+        dot = fn.find('.', dot + 1)
+    found.extend(entry for entry in patterns if _fn_matches(fn, entry[3]))
+    # keep the order of LEXERS, it breaks ties between equal ratings
+    found.sort()
+    for _, modname, name, filename in found:
+        if name not in _lexer_cache:
+            _load_lexers(modname)
+        matches.append((_lexer_cache[name], filename))
     for cls in find_plugin_lexers():
         for filename in cls.filenames:
             if _fn_matches(fn, filename):
@@ -155,11 +202,12 @@ def get_lexer_for_mimetype(_mime, **options):
 
     Raises ClassNotFound if not found.
     """
-    for modname, name, _, _, mimetypes in itervalues(LEXERS):
-        if _mime in mimetypes:
-            if name not in _lexer_cache:
-                _load_lexers(modname)
-            return _lexer_cache[name](**options)
+    info = _get_lexer_index()[2].get(_mime)
+    if info:
+        modname, name = info
+        if name not in _lexer_cache:
+            _load_lexers(modname)
+        return _lexer_cache[name](**options)
     for cls in find_plugin_lexers():
         if _mime in cls.mimetypes:
             return cls(**options)
@@ -178,6 +226,22 @@ def _iter_lexerclasses(plugins=True):
             yield lexer
 
 
+def _iter_analysers():
+    """Return an iterator over the lexer classes that define their own
+    ``analyse_text()``, in the order of `_iter_lexerclasses`.
+
+    Only the modules of these lexers are imported; ``analyse_text()`` of
+    all other lexers returns 0.0 anyway.
+    """
+    for key in sorted(ANALYSERS):
+        module_name, name = LEXERS[key][:2]
+        if name not in _lexer_cache:
+            _load_lexers(module_name)
+        yield _lexer_cache[name]
+    for lexer in find_plugin_lexers():
+        yield lexer
+
+
 def guess_lexer_for_filename(_fn, _text, **options):
     """
     Lookup all lexers that handle those filenames primary (``filenames``)
@@ -197,7 +261,22 @@ def guess_lexer_for_filename(_fn, _text, **options):
     fn = basename(_fn)
     primary = {}
     matching_lexers = set()
-    for lexer in _iter_lexerclasses():
+    # match builtin lexers before importing them
+    for key in sorted(LEXERS):
+        module_name, name, _, filenames, _ = LEXERS[key]
+        for filename in filenames:
+            if _fn_matches(fn, filename):
+                if name not in _lexer_cache:
+                    _load_lexers(module_name)
+                matching_lexers.add(_lexer_cache[name])
+                primary[_lexer_cache[name]] = True
+        for filename in ALIAS_FILENAMES.get(key, ()):
+            if _fn_matches(fn, filename):
+                if name not in _lexer_cache:
+                    _load_lexers(module_name)
+                matching_lexers.add(_lexer_cache[name])
+                primary[_lexer_cache[name]] = False
+    for lexer in find_plugin_lexers():
         for filename in lexer.filenames:
             if _fn_matches(fn, filename):
                 matching_lexers.add(lexer)
@@ -242,7 +321,7 @@ def guess_lexer(_text, **options):
             pass
 
     best_lexer = [0.0, None]
-    for lexer in _iter_lexerclasses():
+    for lexer in _iter_analysers():
         rv = lexer.analyse_text(_text)
         if rv == 1.0:
             return lexer(**options)
@@ -253,6 +332,104 @@ def guess_lexer(_text, **options):
     return best_lexer[1](**options)
 
 
+def _guess_from_shebang(text):
+    """Guess a lexer class from a shebang, or return None."""
+    if text[:2] == '#!':
+        words = [x for x in split_path_re.split(
+                     text[2:].split('\n', 1)[0].strip())
+                 if x and not x.startswith('-')]
+        if words:
+            interpreter = words[-1].lower()
+            for alias in (interpreter, interpreter.rstrip('0123456789.')):
+                info = _get_lexer_index()[1].get(alias)
+                if info:
+                    return find_lexer_class(info[1])
+
+
+def _guess_from_markup(text):
+    """Guess a lexer class from a doctype or XML declaration, or return
+    None.  Template lexers for the same text may score higher."""
+    if html_doctype_matches(text):
+        return find_lexer_class('HTML')
+    if text.lstrip()[:5] == '<?xml' and looks_like_xml(text):
+        return find_lexer_class('XML')
+
+
+def guess_lexer_fast(_text, _budget=0.1, _sample=16384, **options):
+    """Guess a lexer like `guess_lexer`, but with bounded cost.
+
+    Modelines are looked for in the first and last lines of the text, and
+    a shebang decides immediately.  Otherwise the ``analyse_text()``
+    methods only see the first `_sample` characters of the text and run in
+    a worker thread; if they haven't finished after `_budget` seconds, the
+    best lexer found so far is returned.  The lexer modules are imported
+    before the budget starts, and at least one analyser always runs.  Pass
+    None for either to disable the limit.
+
+    A doctype or XML declaration is only a fallback: the HTML or XML lexer
+    is returned unless an analyser scores higher, as template lexers do.
+
+    .. versionadded:: 2.1
+    """
+    text = _text
+    if _sample is not None and len(_text) > _sample:
+        text = _text[:_sample]
+        buf = text + '\n' + _text[-_sample:]
+    else:
+        buf = _text
+    ft = get_filetype_from_buffer(buf)
+    if ft is not None:
+        try:
+            return get_lexer_by_name(ft, **options)
+        except ClassNotFound:
+            pass
+
+    lexer = _guess_from_shebang(text)
+    if lexer is not None:
+        return lexer(**options)
+    fallback = [0.0, _guess_from_markup(text)]
+    if fallback[1] is not None:
+        fallback[0] = fallback[1].analyse_text(text)
+
+    # import the lexer modules before the clock starts: only the analysers
+    # themselves are limited by the budget
+    lexers = list(_iter_analysers())
+    best_lexer = [0.0, None]
+    expired = []
+    started = threading.Event()
+
+    def analyse():
+        try:
+            for lexer in lexers:
+                if expired:
+                    return
+                rv = lexer.analyse_text(text)
+                started.set()
+                if rv > best_lexer[0]:
+                    best_lexer[:] = (rv, lexer)
+                    if rv == 1.0:
+                        return
+        finally:
+            started.set()
+
+    if _budget is None:
+        analyse()
+    else:
+        worker = threading.Thread(target=analyse)
+        worker.daemon = True
+        worker.start()
+        worker.join(_budget)
+        # a guess needs at least one analyser, however long it takes
+        started.wait()
+        expired.append(True)
+    rv, lexer = best_lexer
+    if fallback[0] > rv:
+        rv, lexer = fallback
+    if not rv or lexer is None:
+        raise ClassNotFound('no lexer matching the text found')
+    return lexer(**options)
+
+
 class _automodule(types.ModuleType):
     """Automatically import lexers."""
 
@@ -47,6 +47,7 @@ LEXERS = {
     'BashSessionLexer': ('pygments.lexers.shell', 'Bash Session', ('console',), ('*.sh-session',), ('application/x-shell-session',)),
     'BatchLexer': ('pygments.lexers.shell', 'Batchfile', ('bat', 'batch', 'dosbatch', 'winbatch'), ('*.bat', '*.cmd'), ('application/x-dos-batch',)),
     'BefungeLexer': ('pygments.lexers.esoteric', 'Befunge', ('befunge',), ('*.befunge',), ('application/x-befunge',)),
+    'BinaryTokenLexer': ('pygments.lexers.special', 'Binary token data', ('binarytokens', 'bintokens'), ('*.pygtok',), ('application/x-pygments-binary-tokens',)),
     'BlitzBasicLexer': ('pygments.lexers.basic', 'BlitzBasic', ('blitzbasic', 'b3d', 'bplus'), ('*.bb', '*.decls'), ('text/x-bb',)),
     'BlitzMaxLexer': ('pygments.lexers.basic', 'BlitzMax', ('blitzmax', 'bmax'), ('*.bmx',), ('text/x-bmx',)),
     'BooLexer': ('pygments.lexers.dotnet', 'Boo', ('boo',), ('*.boo',), ('text/x-boo',)),
@@ -374,13 +375,164 @@ LEXERS = {
     'ZephirLexer': ('pygments.lexers.php', 'Zephir', ('zephir',), ('*.zep',), ()),
 }
 
+# lexers that define their own analyse_text()
+ANALYSERS = (
+    'ActionScript3Lexer',
+    'AntlrActionScriptLexer',
+    'AntlrCSharpLexer',
+    'AntlrCppLexer',
+    'AntlrJavaLexer',
+    'AntlrLexer',
+    'AntlrObjectiveCLexer',
+    'AntlrPerlLexer',
+    'AntlrPythonLexer',
+    'AntlrRubyLexer',
+    'ArduinoLexer',
+    'BashLexer',
+    'BugsLexer',
+    'CLexer',
+    'CMakeLexer',
+    'CSharpAspxLexer',
+    'Ca65Lexer',
+    'CbmBasicV2Lexer',
+    'CoqLexer',
+    'CppLexer',
+    'CssDjangoLexer',
+    'CssErbLexer',
+    'CssGenshiLexer',
+    'CssPhpLexer',
+    'CssSmartyLexer',
+    'CudaLexer',
+    'DiffLexer',
+    'DjangoLexer',
+    'DtdLexer',
+    'ECLexer',
+    'ErbLexer',
+    'GasLexer',
+    'GenshiLexer',
+    'GroffLexer',
+    'GroovyLexer',
+    'HaxeLexer',
+    'HtmlDjangoLexer',
+    'HtmlGenshiLexer',
+    'HtmlLexer',
+    'HtmlPhpLexer',
+    'HtmlSmartyLexer',
+    'HttpLexer',
+    'HyLexer',
+    'IniLexer',
+    'JagsLexer',
+    'JasminLexer',
+    'JavascriptDjangoLexer',
+    'JavascriptErbLexer',
+    'JavascriptGenshiLexer',
+    'JavascriptPhpLexer',
+    'JavascriptSmartyLexer',
+    'JspLexer',
+    'JuliaLexer',
+    'LassoCssLexer',
+    'LassoHtmlLexer',
+    'LassoJavascriptLexer',
+    'LassoLexer',
+    'LassoXmlLexer',
+    'LimboLexer',
+    'LogosLexer',
+    'LogtalkLexer',
+    'MakefileLexer',
+    'MasonLexer',
+    'MatlabLexer',
+    'MqlLexer',
+    'NesCLexer',
+    'NixLexer',
+    'NumPyLexer',
+    'ObjectiveCLexer',
+    'ObjectiveCppLexer',
+    'ObjectiveJLexer',
+    'Perl6Lexer',
+    'PerlLexer',
+    'PhpLexer',
+    'PikeLexer',
+    'PrologLexer',
+    'Python3Lexer',
+    'PythonLexer',
+    'QBasicLexer',
+    'RagelCLexer',
+    'RagelCppLexer',
+    'RagelDLexer',
+    'RagelEmbeddedLexer',
+    'RagelJavaLexer',
+    'RagelObjectiveCLexer',
+    'RagelRubyLexer',
+    'RebolLexer',
+    'RegeditLexer',
+    'ResourceLexer',
+    'RexxLexer',
+    'RhtmlLexer',
+    'RslLexer',
+    'RstLexer',
+    'RubyLexer',
+    'SLexer',
+    'SmaliLexer',
+    'SmartyLexer',
+    'SourcesListLexer',
+    'SspLexer',
+    'StanLexer',
+    'SwigLexer',
+    'TclLexer',
+    'TeaTemplateLexer',
+    'TexLexer',
+    'VbNetAspxLexer',
+    'VbNetLexer',
+    'VelocityLexer',
+    'VelocityXmlLexer',
+    'XmlDjangoLexer',
+    'XmlErbLexer',
+    'XmlLexer',
+    'XmlPhpLexer',
+    'XmlSmartyLexer',
+    'XsltLexer',
+)
+
+ALIAS_FILENAMES = {
+    'CssDjangoLexer': ('*.css',),
+    'CssErbLexer': ('*.css',),
+    'CssGenshiLexer': ('*.css',),
+    'CssPhpLexer': ('*.css',),
+    'CssSmartyLexer': ('*.css', '*.tpl'),
+    'GenshiLexer': ('*.xml',),
+    'HtmlDjangoLexer': ('*.html', '*.htm', '*.xhtml'),
+    'HtmlGenshiLexer': ('*.html', '*.htm', '*.xhtml'),
+    'HtmlPhpLexer': ('*.php', '*.html', '*.htm', '*.xhtml', '*.php[345]'),
+    'HtmlSmartyLexer': ('*.html', '*.htm', '*.xhtml', '*.tpl'),
+    'JavascriptDjangoLexer': ('*.js',),
+    'JavascriptErbLexer': ('*.js',),
+    'JavascriptGenshiLexer': ('*.js',),
+    'JavascriptPhpLexer': ('*.js',),
+    'JavascriptSmartyLexer': ('*.js', '*.tpl'),
+    'LassoCssLexer': ('*.css',),
+    'LassoHtmlLexer': ('*.html', '*.htm', '*.xhtml', '*.lasso', '*.lasso[89]', '*.incl', '*.inc', '*.las'),
+    'LassoJavascriptLexer': ('*.js',),
+    'LassoLexer': ('*.incl', '*.inc', '*.las'),
+    'LassoXmlLexer': ('*.xml', '*.lasso', '*.lasso[89]', '*.incl', '*.inc', '*.las'),
+    'RhtmlLexer': ('*.html', '*.htm', '*.xhtml'),
+    'VelocityHtmlLexer': ('*.html', '*.fhtml'),
+    'VelocityXmlLexer': ('*.xml', '*.vm'),
+    'XmlDjangoLexer': ('*.xml',),
+    'XmlErbLexer': ('*.xml',),
+    'XmlPhpLexer': ('*.xml', '*.php', '*.php[345]'),
+    'XmlSmartyLexer': ('*.xml', '*.tpl'),
+}
+
 if __name__ == '__main__':  # pragma: no cover
     import sys
     import os
 
     # lookup lexers
     found_lexers = []
+    found_analysers = []
+    found_alias_filenames = []
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+    from pygments.lexer import Lexer
     for root, dirs, files in os.walk('.'):
         for filename in files:
             if filename.endswith('.py') and not filename.startswith('_'):
@@ -397,8 +549,16 @@ if __name__ == '__main__':  # pragma: no cover
                                      tuple(lexer.aliases),
                                      tuple(lexer.filenames),
                                      tuple(lexer.mimetypes))))
+                    if lexer.analyse_text is not Lexer.analyse_text:
+                        found_analysers.append(repr(lexer_name))
+                    if lexer.alias_filenames:
+                        found_alias_filenames.append(
+                            '%r: %r' % (lexer_name,
+                                        tuple(lexer.alias_filenames)))
     # sort them to make the diff minimal
     found_lexers.sort()
+    found_analysers.sort()
+    found_alias_filenames.sort()
 
     # extract useful sourcecode from this file
     with open(__file__) as fp:
@@ -410,6 +570,11 @@ if __name__ == '__main__':  # pragma: no cover
     with open(__file__, 'w') as fp:
         fp.write(header)
         fp.write('LEXERS = {\n    %s,\n}\n\n' % ',\n    '.join(found_lexers))
+        fp.write('# lexers that define their own analyse_text()\n')
+        fp.write('ANALYSERS = (\n    %s,\n)\n\n' %
+                 ',\n    '.join(found_analysers))
+        fp.write('ALIAS_FILENAMES = {\n    %s,\n}\n\n' %
+                 ',\n    '.join(found_alias_filenames))
         fp.write(footer)
 
     print ('=== %d lexers processed.' % len(found_lexers))
@@ -15,12 +15,17 @@ from pygments.lexer import RegexLexer, include, words, bygroups
 from pygments.token import Text, Comment, Operator, Keyword, Name, String, \
     Number, Punctuation, Error
 
-from pygments.lexers._openedge_builtins import OPENEDGEKEYWORDS
 
 __all__ = ['CobolLexer', 'CobolFreeformatLexer', 'ABAPLexer', 'OpenEdgeLexer',
            'GoodDataCLLexer', 'MaqlLexer']
 
 
+def _openedge_keywords():
+    """Return `OPENEDGEKEYWORDS`, imported on first use."""
+    from pygments.lexers._openedge_builtins import OPENEDGEKEYWORDS
+    return OPENEDGEKEYWORDS
+
+
 class CobolLexer(RegexLexer):
     """
     Lexer for OpenCOBOL code.
@@ -445,7 +450,7 @@ class OpenEdgeLexer(RegexLexer):
              r'INT64|INTEGER|INT|INTE|INTEG|INTEGE|'
              r'LOGICAL|LONGCHAR|MEMPTR|RAW|RECID|ROWID)\s*($|(?=[^0-9a-z_\-]))')
 
-    keywords = words(OPENEDGEKEYWORDS,
+    keywords = words(_openedge_keywords,
                      prefix=r'(?i)(^|(?<=[^0-9a-z_\-]))',
                      suffix=r'\s*($|(?=[^0-9a-z_\-]))')
 
@@ -17,12 +17,17 @@ from pygments.token import Text, Comment, Operator, Keyword, Name, String, \
     Number, Punctuation
 
 from pygments.lexers.c_cpp import CLexer, CppLexer
-from pygments.lexers import _mql_builtins
 
 __all__ = ['PikeLexer', 'NesCLexer', 'ClayLexer', 'ECLexer', 'ValaLexer',
            'CudaLexer', 'SwigLexer', 'MqlLexer', 'ArduinoLexer']
 
 
+def _mql_builtins(name):
+    """Return a word list of `_mql_builtins`, imported on first use."""
+    from pygments.lexers import _mql_builtins
+    return getattr(_mql_builtins, name)
+
+
 class PikeLexer(CppLexer):
     """
     For `Pike <http://pike.lysator.liu.se/>`_ source code.
@@ -402,11 +407,16 @@ class MqlLexer(CppLexer):
 
     tokens = {
         'statements': [
-            (words(_mql_builtins.keywords, suffix=r'\b'), Keyword),
-            (words(_mql_builtins.c_types, suffix=r'\b'), Keyword.Type),
-            (words(_mql_builtins.types, suffix=r'\b'), Name.Function),
-            (words(_mql_builtins.constants, suffix=r'\b'), Name.Constant),
-            (words(_mql_builtins.colors, prefix='(clr)?', suffix=r'\b'),
+            (words(lambda: _mql_builtins('keywords'), suffix=r'\b'),
+             Keyword),
+            (words(lambda: _mql_builtins('c_types'), suffix=r'\b'),
+             Keyword.Type),
+            (words(lambda: _mql_builtins('types'), suffix=r'\b'),
+             Name.Function),
+            (words(lambda: _mql_builtins('constants'), suffix=r'\b'),
+             Name.Constant),
+            (words(lambda: _mql_builtins('colors'), prefix='(clr)?',
+                   suffix=r'\b'),
              Name.Constant),
             inherit,
         ],
@@ -15,11 +15,16 @@ from pygments.lexer import Lexer, RegexLexer, bygroups, words, do_insertions
 from pygments.token import Text, Comment, Operator, Keyword, Name, String, \
     Number, Punctuation, Generic, Whitespace
 
-from pygments.lexers import _scilab_builtins
 
 __all__ = ['MatlabLexer', 'MatlabSessionLexer', 'OctaveLexer', 'ScilabLexer']
 
 
+def _scilab_builtins(name):
+    """Return a word list of `_scilab_builtins`, imported on first use."""
+    from pygments.lexers import _scilab_builtins
+    return getattr(_scilab_builtins, name)
+
+
 class MatlabLexer(RegexLexer):
     """
     For Matlab source code.
@@ -620,11 +625,12 @@ class ScilabLexer(RegexLexer):
                 'until', 'unwind_protect', 'unwind_protect_cleanup', 'while'), suffix=r'\b'),
              Keyword),
 
-            (words(_scilab_builtins.functions_kw +
-                   _scilab_builtins.commands_kw +
-                   _scilab_builtins.macros_kw, suffix=r'\b'), Name.Builtin),
+            (words(lambda: _scilab_builtins('functions_kw') +
+                   _scilab_builtins('commands_kw') +
+                   _scilab_builtins('macros_kw'), suffix=r'\b'), Name.Builtin),
 
-            (words(_scilab_builtins.variables_kw, suffix=r'\b'), Name.Constant),
+            (words(lambda: _scilab_builtins('variables_kw'), suffix=r'\b'),
+             Name.Constant),
 
             # operators:
             (r'-|==|~=|<|>|<=|>=|&&|&|~|\|\|?', Operator),
@@ -12,11 +12,11 @@
 import re
 
 from pygments.lexer import Lexer
-from pygments.token import Token, Error, Text
+from pygments.token import Token, Error, Text, string_to_tokentype
 from pygments.util import get_choice_opt, text_type, BytesIO
 
 
-__all__ = ['TextLexer', 'RawTokenLexer']
+__all__ = ['TextLexer', 'RawTokenLexer', 'BinaryTokenLexer']
 
 
 class TextLexer(Lexer):
@@ -98,3 +98,102 @@ class RawTokenLexer(Lexer):
                 val = val[2:-2].decode('unicode-escape')
             yield length, ttype, val
             length += len(val)
+
+
+class BinaryTokenLexer(Lexer):
+    """
+    Recreate a token stream formatted with the `BinaryTokenFormatter`.  The
+    input must be given as bytes.  This lexer raises exceptions during
+    parsing if the token stream is malformed.
+
+    Additional options accepted:
+
+    `compress`
+        If set to ``"gz"`` or ``"bz2"``, decompress the token stream with
+        the given compression algorithm before lexing (default: ``""``).
+
+    .. versionadded:: 2.1
+    """
+    name = 'Binary token data'
+    aliases = ['binarytokens', 'bintokens']
+    filenames = ['*.pygtok']
+    mimetypes = ['application/x-pygments-binary-tokens']
+
+    def __init__(self, **options):
+        self.compress = get_choice_opt(options, 'compress',
+                                       ['', 'none', 'gz', 'bz2'], '')
+        Lexer.__init__(self, **options)
+
+    def get_tokens(self, text):
+        if isinstance(text, text_type):
+            raise TypeError('The binary token lexer needs bytes as input')
+        if self.compress == 'gz':
+            import gzip
+            gzipfile = gzip.GzipFile('', 'rb', 9, BytesIO(text))
+            text = gzipfile.read()
+        elif self.compress == 'bz2':
+            import bz2
+            text = bz2.decompress(text)
+
+        # do not call Lexer.get_tokens(), the input must not be decoded
+        for i, t, v in self.get_tokens_unprocessed(text):
+            yield t, v
+
+    def get_tokens_unprocessed(self, text):
+        from pygments.formatters.other import BINARY_TOKENS_MAGIC
+        if text[:len(BINARY_TOKENS_MAGIC)] != BINARY_TOKENS_MAGIC:
+            raise ValueError('not a binary token stream')
+        data = bytearray(text)
+        ttypes = [None]
+        pos = len(BINARY_TOKENS_MAGIC)
+        end = len(data)
+        length = 0
+        try:
+            while pos < end:
+                # token type index
+                index = data[pos]
+                pos += 1
+                if index >= 128:
+                    index, pos = _read_varint(data, pos - 1)
+                # value length
+                size = data[pos]
+                pos += 1
+                if size >= 128:
+                    size, pos = _read_varint(data, pos - 1)
+                if pos + size > end:
+                    raise IndexError
+                value = data[pos:pos + size].decode('utf-8')
+                pos += size
+                if index == 0:
+                    # definition of a new token type
+                    ttypes.append(_binary_ttype(value))
+                    continue
+                yield length, ttypes[index], value
+                length += len(value)
+        except IndexError:
+            raise ValueError('malformed binary token stream')
+
+
+def _read_varint(data, pos):
+    """Decode the varint at `pos`, return it and the position after it."""
+    n = 0
+    shift = 0
+    while 1:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 128:
+            return n, pos
+        shift += 7
+
+
+def _binary_ttype(name):
+    ttype = _ttype_cache.get(name)
+    if not ttype:
+        if name != 'Token' and not name.startswith('Token.'):
+            raise ValueError('malformed token name')
+        for part in name.split('.')[1:]:
+            if not part or not part[0].isupper():
+                raise ValueError('malformed token name')
+        ttype = _ttype_cache[name] = string_to_tokentype(name[6:])
+    return ttype
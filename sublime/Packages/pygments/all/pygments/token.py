@@ -43,6 +43,10 @@ class _TokenType(tuple):
     def __repr__(self):
         return 'Token' + (self and '.' or '') + '.'.join(self)
 
+    def __reduce__(self):
+        # token types are singletons, keep them so when unpickled
+        return string_to_tokentype, ('.'.join(self),)
+
 
 Token       = _TokenType()
 
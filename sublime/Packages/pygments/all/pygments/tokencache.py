@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+    pygments.tokencache
+    ~~~~~~~~~~~~~~~~~~~
+
+    On-disk cache of the expensive parts of processing `RegexLexer` token
+    definitions: the regexes generated by `words` and the compiled
+    programs of all rule regexes.
+
+    The cache is disabled by default; call `enable` with a directory to
+    use it.  There is one cache file per lexer class, in a subdirectory
+    named after the Pygments and Python versions.  Since entries are keyed
+    by the regex source, a cache file that is out of date with its lexer
+    is harmless: missing entries are compiled and added.
+
+    :copyright: Copyright 2006-2015 by the Pygments team, see AUTHORS.
+    :license: BSD, see LICENSE for details.
+"""
+
+import os
+import re
+import sys
+import pickle
+
+import _sre
+
+try:
+    from re import _parser as sre_parse, _compiler as sre_compile
+except ImportError:
+    import sre_parse
+    import sre_compile
+
+__all__ = ['enable', 'disable', 'load']
+
+_directory = None
+
+
+def enable(directory):
+    """
+    Cache processed token definitions in `directory`, which is created if
+    it doesn't exist.
+    """
+    global _directory
+    from pygments import __version__
+    _directory = os.path.join(directory, 'pygments-%s-py%d.%d-%d' % (
+        __version__, sys.version_info[0], sys.version_info[1],
+        getattr(_sre, 'MAGIC', 0)))
+
+
+def disable():
+    """Stop using the token definition cache."""
+    global _directory
+    _directory = None
+
+
+def load(cls):
+    """
+    Return the `LexerCache` for the lexer class `cls`, or None if the cache
+    is disabled.
+    """
+    if _directory is None:
+        return None
+    return LexerCache(os.path.join(_directory, '%s.%s.pickle' %
+                                   (cls.__module__, cls.__name__)))
+
+
+def _program(pattern, flags):
+    """
+    Compile `pattern` the way `sre_compile.compile` does, returning the
+    arguments for `_sre.compile` that follow the pattern.
+    """
+    # plain ints only: opcodes and flags may be int subclasses that don't
+    # survive pickling
+    flags = int(flags)
+    p = sre_parse.parse(pattern, flags)
+    code = [int(c) for c in sre_compile._code(p, flags)]
+    state = getattr(p, 'state', None) or p.pattern
+    groupindex = dict(state.groupdict)
+    indexgroup = [None] * state.groups
+    for k, i in groupindex.items():
+        indexgroup[i] = k
+    return (flags | int(state.flags), code, state.groups - 1,
+            groupindex, tuple(indexgroup))
+
+
+class LexerCache(object):
+    """
+    Cached regexes of a single lexer class.  Lookups that miss are
+    computed and stored when `save` is called.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.dirty = False
+        try:
+            with open(filename, 'rb') as fp:
+                self.words, self.programs = pickle.load(fp)
+        except Exception:
+            self.words, self.programs = {}, {}
+
+    def regex(self, regex):
+        """Return the regex source for a rule regex or `words` instance."""
+        if not hasattr(regex, 'get'):
+            return regex
+        if not hasattr(regex, 'get_words'):
+            return regex.get()
+        key = (tuple(regex.get_words()), regex.prefix, regex.suffix)
+        source = self.words.get(key)
+        if source is None:
+            source = self.words[key] = regex.get()
+            self.dirty = True
+        return source
+
+    def compile(self, regex, flags):
+        """Like ``re.compile(regex, flags)``, but from the cache if possible."""
+        pattern = self.regex(regex)
+        key = (pattern, int(flags))
+        program = self.programs.get(key)
+        if program is not None:
+            try:
+                return _sre.compile(pattern, *program)
+            except Exception:
+                pass
+        try:
+            program = _program(pattern, flags)
+            compiled = _sre.compile(pattern, *program)
+        except Exception:
+            # the internals of the re module differ on this interpreter, or
+            # the regex is invalid: let re report that
+            self.programs.pop(key, None)
+            return re.compile(pattern, flags)
+        self.programs[key] = program
+        self.dirty = True
+        return compiled
+
+    def save(self):
+        """Write the cache file if anything was added to it."""
+        if not self.dirty:
+            return
+        # imported here, tempfile pulls in the math module, which is
+        # shadowed when lexers/_mapping.py is run as a script
+        import tempfile
+        directory = os.path.dirname(self.filename)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, tmpname = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump((self.words, self.programs), fp, 2)
+            try:
+                os.rename(tmpname, self.filename)
+            except OSError:
+                # Windows won't rename over an existing file
+                os.remove(self.filename)
+                os.rename(tmpname, self.filename)
+        except (IOError, OSError):
+            return
+        self.dirty = False
@@ -80,6 +80,18 @@ def get_int_opt(options, optname, default=None):
                               string, optname))
 
 
+def get_float_opt(options, optname, default=None):
+    string = options.get(optname, default)
+    try:
+        return float(string)
+    except TypeError:
+        raise OptionError('Invalid type %r for option %s; you '
+                          'must give a number' % (string, optname))
+    except ValueError:
+        raise OptionError('Invalid value %r for option %s; you '
+                          'must give a number' % (string, optname))
+
+
 def get_list_opt(options, optname, default=None):
     val = options.get(optname, default)
     if isinstance(val, string_types):
@@ -25,6 +25,7 @@ import optparse
 import codecs
 import warnings
 import markdown
+import markdown.batch
 try:
     # We use `unsafe_load` because users may need to pass in actual Python
     # objects. As this is only available from the CLI, the user has much
@@ -49,7 +50,9 @@ def parse_options(args=None, values=None):
     Define and parse `optparse` options for command-line usage.
     """
     usage = """%prog [options] [INPUTFILE]
-       (STDIN is assumed if no INPUTFILE is given)"""
+       (STDIN is assumed if no INPUTFILE is given)
+       %prog [options] INPUTFILE INPUTFILE ...
+       (each INPUTFILE is written to a file with an .html extension)"""
     desc = "A Python implementation of John Gruber's Markdown. " \
            "https://Python-Markdown.github.io/"
     ver = "%%prog %s" % markdown.__version__
@@ -58,6 +61,21 @@ def parse_options(args=None, values=None):
     parser.add_option("-f", "--file", dest="filename", default=None,
                       help="Write output to OUTPUT_FILE. Defaults to STDOUT.",
                       metavar="OUTPUT_FILE")
+    parser.add_option("-d", "--output_dir", dest="output_dir", default=None,
+                      help="Write the output of several input files to "
+                      "OUTPUT_DIR. Defaults to the directory of each input "
+                      "file.", metavar="OUTPUT_DIR")
+    parser.add_option("-j", "--jobs", dest="jobs", type="int", default=0,
+                      help="Convert several input files in JOBS processes. "
+                      "Defaults to the number of CPUs.", metavar="JOBS")
+    parser.add_option("-t", "--timing", dest="timing",
+                      action="store_true", default=False,
+                      help="Print the time taken for each of several input "
+                      "files.")
+    parser.add_option("-p", "--profile", dest="profile",
+                      action="store_true", default=False,
+                      help="Print the calls, time and input and output size "
+                      "of every processor and pattern to STDERR.")
     parser.add_option("-e", "--encoding", dest="encoding",
                       help="Encoding for input and output files.",)
     parser.add_option("-o", "--output_format", dest="output_format",
@@ -122,6 +140,26 @@ def parse_options(args=None, values=None):
         'lazy_ol': options.lazy_ol
     }
 
+    if len(args) > 1 or options.output_dir:
+        # Batch mode: the output file names follow from the input files.
+        if options.filename:
+            parser.error("--file can not be used with several input files "
+                         "or --output_dir.")
+        if not args:
+            parser.error("--output_dir requires input files.")
+        if options.profile:
+            parser.error("--profile can not be used with several input files "
+                         "or --output_dir.")
+        del opts['input'], opts['output']
+        opts.update({
+            'inputs': args,
+            'output_dir': options.output_dir,
+            'jobs': options.jobs,
+            'timing': options.timing
+        })
+    elif options.profile:
+        opts['profile'] = True
+
     return opts, options.verbose
 
 
@@ -143,7 +181,30 @@ def run():  # pragma: no cover
         warn_logger.addHandler(console_handler)
 
     # Run
-    markdown.markdownFromFile(**options)
+    if 'inputs' in options:
+        timing = options.pop('timing')
+        try:
+            results = markdown.batch.convertFiles(**options)
+        except ValueError as e:
+            sys.exit('Error: %s' % e)
+        if timing:
+            for input, output, seconds, error in results:
+                print('%9.4f  %s' % (seconds, input))
+            print('%9.4f  total, %d files' %
+                  (sum(r[2] for r in results), len(results)))
+        errors = [(r[0], r[3]) for r in results if r[3] is not None]
+        for input, error in errors:
+            sys.stderr.write('Error converting %s: %s\n' % (input, error))
+        if errors:
+            sys.exit(1)
+    elif options.pop('profile', False):
+        md = markdown.Markdown(**options)
+        profile = md.profile()
+        md.convertFile(options['input'], options['output'],
+                       options['encoding'])
+        sys.stderr.write(profile.report() + '\n')
+    else:
+        markdown.markdownFromFile(**options)
 
 
 if __name__ == '__main__':  # pragma: no cover
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Python Markdown
+
+A Python implementation of John Gruber's Markdown.
+
+Documentation: https://python-markdown.github.io/
+GitHub: https://github.com/Python-Markdown/markdown/
+PyPI: https://pypi.org/project/Markdown/
+
+Started by Manfred Stienstra (http://www.dwerg.net/).
+Maintained for a few years by Yuri Takhteyev (http://www.freewisdom.org).
+Currently maintained by Waylan Limberg (https://github.com/waylan),
+Dmitry Shachnev (https://github.com/mitya57) and Isaac Muse (https://github.com/facelessuser).
+
+Copyright 2007-2018 The Python Markdown Project (v. 1.7 and later)
+Copyright 2004, 2005, 2006 Yuri Takhteyev (v. 0.2-1.6b)
+Copyright 2004 Manfred Stienstra (the original version)
+
+License: BSD (see LICENSE.md for details).
+
+BATCH CONVERSION
+=============================================================================
+
+Conversion of many files with the same configuration.  Setting up a
+`Markdown` instance loads and registers every extension, which can take
+longer than converting a small document, so every worker process sets up
+one instance and reuses it, returning it to its initial state between the
+documents.
+"""
+
+import os
+import time
+from .core import Markdown
+
+__all__ = ['convertFiles', 'output_path']
+
+
+# Set in the worker processes by _init_worker.
+_worker_md = None
+_worker_patterns = None
+
+
+def _init_worker(kwargs):
+    global _worker_md, _worker_patterns
+    _worker_md = Markdown(**kwargs)
+    # `reset` doesn't remove the inline patterns registered while converting,
+    # e.g. by `abbr`, so they are restored from this copy before every file.
+    registry = _worker_md.inlinePatterns
+    _worker_patterns = [(p.name, registry[p.name], p.priority) for p in registry._priority]
+
+
+def _reset_worker():
+    """ Return the Markdown instance of the worker to its initial state. """
+    md = _worker_md
+    md.reset()
+    base = dict((name, (item, priority)) for name, item, priority in _worker_patterns)
+    for p in list(md.inlinePatterns._priority):
+        if p.name not in base:
+            md.inlinePatterns.deregister(p.name)
+        elif md.inlinePatterns[p.name] is not base[p.name][0]:
+            md.inlinePatterns.register(base[p.name][0], p.name, base[p.name][1])
+    # The stash, including the tags stored by `md_in_html`.
+    md.htmlStash.tag_counter = 0
+    md.htmlStash.tag_data = []
+    if hasattr(md.parser.blockprocessors, 'tag_counter'):
+        md.parser.blockprocessors.tag_counter = -1
+
+
+def _convert_file(job):
+    """ Convert one file with the Markdown instance of the worker. """
+    input, output, encoding = job
+    start = time.perf_counter()
+    try:
+        _reset_worker()
+        _worker_md.convertFile(input, output, encoding)
+    except Exception as e:
+        # Exceptions may not be picklable, their messages are.
+        error = '{}: {}'.format(e.__class__.__name__, e)
+    else:
+        error = None
+    return input, output, time.perf_counter() - start, error
+
+
+def output_path(input, output_dir=None, base=None):
+    """
+    Return the name of the HTML file for the input file `input`: the same
+    name with an `.html` extension.  If `output_dir` is given, the file is
+    placed in it at the path of `input` relative to the directory `base`
+    (default: the directory of `input`).
+    """
+    output = os.path.splitext(input)[0] + '.html'
+    if output_dir is not None:
+        if base is None:
+            base = os.path.dirname(os.path.abspath(input))
+        output = os.path.join(output_dir, os.path.relpath(os.path.abspath(output), base))
+    return output
+
+
+def convertFiles(inputs, output_dir=None, jobs=0, encoding=None, **kwargs):
+    """Convert markdown files to HTML files, in several processes.
+
+    Every input file is written to the file named by `output_path`.  With
+    an `output_dir`, the inputs keep their paths relative to the deepest
+    directory that contains all of them, and missing directories are
+    created.  The files are converted in `jobs` worker processes, each of
+    which sets up one Markdown instance and reuses it for all of its files.
+
+    Keyword arguments:
+
+    * inputs: A list of file names.
+    * output_dir: Directory for the output files. Defaults to the directory
+      of each input file.
+    * jobs: Number of processes. Defaults to the number of CPUs; with 1, the
+      files are converted in the calling process.
+    * encoding: Encoding of input and output files. Defaults to utf-8.
+    * Any arguments accepted by the Markdown class, which must be picklable
+      to be sent to the workers.
+
+    Raises a `ValueError` before converting anything if two inputs would be
+    written to the same output file.
+
+    Returns: A list of `(input, output, seconds, error)` tuples in the order
+    of `inputs`, with the time taken to read, convert and write each file,
+    and the error message if that failed, otherwise `None`.  A failure
+    doesn't stop the conversion of the other files.
+
+    """
+    base = None
+    if output_dir is not None and inputs:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(input)) for input in inputs])
+    work = [(input, output_path(input, output_dir, base), encoding)
+            for input in inputs]
+
+    seen = {}
+    for input, output, _ in work:
+        key = os.path.normcase(os.path.abspath(output))
+        if key in seen:
+            raise ValueError('"{}" and "{}" would both be written to "{}".'.format(
+                seen[key], input, output
+            ))
+        seen[key] = input
+    if output_dir is not None:
+        for directory in set(os.path.dirname(output) for _, output, _ in work):
+            os.makedirs(directory, exist_ok=True)
+
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(work))
+    if jobs < 2:
+        _init_worker(kwargs)
+        return [_convert_file(job) for job in work]
+
+    import multiprocessing
+    # Hand out the files in small groups: the per-file overhead of the pool
+    # is noticeable with small documents.
+    chunksize = max(1, min(16, len(work) // (jobs * 4)))
+    with multiprocessing.Pool(jobs, _init_worker, (kwargs,)) as pool:
+        return list(pool.imap(_convert_file, work, chunksize))
@@ -200,6 +200,25 @@ class Markdown:
 
         return self
 
+    def profile(self, profile=None):
+        """
+        Record the calls to all processors and patterns in `profile`, a new
+        `util.RegistryProfile` if `None`, and return it.  Pass `False` to
+        stop recording.
+        """
+        if profile is None:
+            profile = util.RegistryProfile()
+        registries = [
+            ('preprocessors', self.preprocessors),
+            ('blockprocessors', self.parser.blockprocessors),
+            ('inlinePatterns', self.inlinePatterns),
+            ('treeprocessors', self.treeprocessors),
+            ('postprocessors', self.postprocessors)
+        ]
+        for label, registry in registries:
+            registry.profile(profile or None, label)
+        return profile
+
     def set_output_format(self, format):
         """ Set the output format for the class instance. """
         self.output_format = format.lower().rstrip('145')  # ignore num
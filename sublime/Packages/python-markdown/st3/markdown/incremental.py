@@ -0,0 +1,565 @@
+# -*- coding: utf-8 -*-
+"""
+Python Markdown
+
+A Python implementation of John Gruber's Markdown.
+
+Documentation: https://python-markdown.github.io/
+GitHub: https://github.com/Python-Markdown/markdown/
+PyPI: https://pypi.org/project/Markdown/
+
+Started by Manfred Stienstra (http://www.dwerg.net/).
+Maintained for a few years by Yuri Takhteyev (http://www.freewisdom.org).
+Currently maintained by Waylan Limberg (https://github.com/waylan),
+Dmitry Shachnev (https://github.com/mitya57) and Isaac Muse (https://github.com/facelessuser).
+
+Copyright 2007-2018 The Python Markdown Project (v. 1.7 and later)
+Copyright 2004, 2005, 2006 Yuri Takhteyev (v. 0.2-1.6b)
+Copyright 2004 Manfred Stienstra (the original version)
+
+License: BSD (see LICENSE.md for details).
+
+INCREMENTAL CONVERSION
+=============================================================================
+
+Conversion of documents that are converted again and again with small
+changes, e.g. for a live preview.  The document is split into top-level
+blocks which are converted on their own, and the HTML of every block is
+cached until the block, the document-wide definitions or the configuration
+change.  The same splitting allows to convert large files block by block,
+without holding all of the document in memory.
+"""
+
+import codecs
+import re
+import shutil
+import sys
+import tempfile
+from .core import Markdown
+from .preprocessors import Preprocessor
+from .postprocessors import Postprocessor
+
+__all__ = ['IncrementalMarkdown']
+
+
+# Preprocessors whose effect on the splitting of the document is known.
+SAFE_PREPROCESSORS = [
+    'normalize_whitespace', 'fenced_code_block', 'html_block', 'abbr',
+    'reference', 'incremental_definitions'
+]
+
+# The first line of a block which may continue the previous block: an
+# indented line, a list item, a blockquote, a definition (`def_list`) or a
+# reference or abbreviation definition, whose removal joins the lines around
+# it.
+CONTINUATION_RE = re.compile(r'[ >:]|[*+-][ ]|\d+[.)][ ]|\*?\[[^\]]*\][ ]?:')
+DEFINITION_RE = re.compile(r'[ ]{0,3}:[ ]', re.MULTILINE)
+FENCE_START_RE = re.compile(r'~{3,}|`{3,}')
+
+
+class DefinitionsPreprocessor(Preprocessor):
+    """
+    Restore the definitions of the whole document.
+
+    A block which contains a reference or abbreviation definition redefines
+    it while the block is converted.  This runs after those preprocessors
+    and puts back the values that are in effect for the whole document, which
+    differ when a name is defined more than once.
+    """
+
+    def __init__(self, md):
+        super().__init__(md)
+        self.references = None
+        self.patterns = []
+
+    def run(self, lines):
+        if self.references is not None:
+            self.md.references.update(self.references)
+            for name, item, priority in self.patterns:
+                if self.md.inlinePatterns[name] is not item:
+                    self.md.inlinePatterns.register(item, name, priority)
+        return lines
+
+
+class OutputPostprocessor(Postprocessor):
+    """
+    Keep the output of a block before it is stripped: raw HTML at the end of
+    a block is followed by a blank line within the document.
+    """
+
+    def __init__(self, md):
+        super().__init__(md)
+        self.text = ''
+
+    def run(self, text):
+        self.text = text
+        return text
+
+
+class IncrementalMarkdown(Markdown):
+    """
+    Convert Markdown to HTML, reusing the HTML of unchanged blocks.
+
+    Accepts the same keyword arguments as `Markdown`.  `convert` splits the
+    source at blank lines which separate top-level blocks that don't
+    depend on each other, converts every block on its own and caches the
+    result.  The cache key of a block is its text together with the
+    document-wide definitions and the configuration of the instance:
+
+    * Reference links and abbreviations are collected from the whole document
+      on every call.  Any change to them invalidates all cached blocks.
+    * Extensions which keep state for the whole document, i.e. those that
+      are registered with `registerExtension` and have a `reset` method
+      (`footnotes`, `toc` and `meta`), and preprocessors other than the
+      built-in ones and those of `fenced_code` and `abbr`, can't be handled
+      block by block: the document is then converted as a whole, without
+      caching.
+    * Changes to the output format, the tab length or the registered
+      processors invalidate all cached blocks.
+
+    Unlike `Markdown`, every call to `convert` starts from a fresh state,
+    like ``md.reset().convert(source)``.  The result is the same.
+
+    `convertFile` streams: the input is read twice, once for the definitions
+    and once to convert and write it block by block.  Only the blocks being
+    split off are held in memory, `stream_lines` lines at a time.
+    """
+
+    stream_lines = 1000
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.preprocessors.register(DefinitionsPreprocessor(self), 'incremental_definitions', 5)
+        self.postprocessors.register(OutputPostprocessor(self), 'incremental_output', 0)
+        self.block_cache = {}
+        # Patterns registered while converting, e.g. by `abbr`, are removed
+        # again before the next document.
+        self._base_patterns = self._registry_items(self.inlinePatterns)
+
+    def _registry_items(self, registry):
+        """ Return the (name, item, priority) items of a registry. """
+        return [(p.name, registry[p.name], p.priority) for p in registry._priority]
+
+    def _restore_patterns(self):
+        """ Drop the inline patterns added by the previous document. """
+        base = dict((name, (item, priority)) for name, item, priority in self._base_patterns)
+        for name, item, priority in self._registry_items(self.inlinePatterns):
+            if name not in base:
+                self.inlinePatterns.deregister(name)
+            elif item is not base[name][0]:
+                self.inlinePatterns.register(base[name][0], name, base[name][1])
+
+    def _reset_stash(self):
+        """ Reset the stash, including the tags stored by `md_in_html`. """
+        self.htmlStash.reset()
+        self.htmlStash.tag_counter = 0
+        self.htmlStash.tag_data = []
+        if hasattr(self.parser.blockprocessors, 'tag_counter'):
+            self.parser.blockprocessors.tag_counter = -1
+
+    def _document_level(self):
+        """ Return True if the document has to be converted as a whole. """
+        for extension in self.registeredExtensions:
+            if hasattr(extension, 'reset'):
+                return True
+        for p in self.preprocessors._priority:
+            if p.name not in SAFE_PREPROCESSORS:
+                return True
+        if 'fenced_code_block' in self.preprocessors and \
+                not hasattr(self.preprocessors['fenced_code_block'], 'FENCED_BLOCK_RE'):
+            return True
+        return False
+
+    def _config_key(self):
+        """ Return the part of the cache keys that depends on the configuration. """
+        return (
+            self.output_format, self.tab_length, self.stripTopLevelTags,
+            tuple(p.name for p in self.preprocessors._priority),
+            tuple(p.name for p in self.parser.blockprocessors._priority),
+            tuple(name for name, item, priority in self._base_patterns),
+            tuple(p.name for p in self.treeprocessors._priority),
+            tuple(p.name for p in self.postprocessors._priority)
+        )
+
+    def clear_cache(self):
+        """ Forget the HTML of all blocks. """
+        self.block_cache = {}
+        return self
+
+    def convert(self, source):
+        """
+        Convert markdown to serialized XHTML or HTML, converting only the
+        blocks which changed since the previous call.
+
+        Keyword arguments:
+
+        * source: Source text as a Unicode string.
+
+        """
+        if not source.strip():
+            return ''
+
+        definitions = self.preprocessors['incremental_definitions']
+        definitions.references = None
+        self.reset()
+        self._reset_stash()
+        self._restore_patterns()
+        if self._document_level():
+            self.block_cache = {}
+            return super().convert(source)
+
+        lines, fences = self._preprocess(str(source))
+        context = (
+            tuple(sorted(self.references.items())),
+            tuple((name, getattr(item, 'pattern', None), getattr(item, 'title', None))
+                  for name, item, priority in definitions.patterns)
+        )
+        key = (context, self._config_key())
+
+        definitions.references = dict(self.references)
+        output = self.postprocessors['incremental_output']
+        cache = {}
+        blocks = []
+        try:
+            for start, end in self._split(lines, fences):
+                block = '\n'.join(lines[start:end + 1])
+                html = self.block_cache.get((block, key))
+                if html is None:
+                    self._reset_stash()
+                    output.text = ''
+                    super().convert(block)
+                    html = output.text
+                cache[(block, key)] = html
+                if html.strip():
+                    blocks.append(html)
+        finally:
+            definitions.references = None
+        # Only the blocks of the current document are kept.
+        self.block_cache = cache
+        return '\n'.join(blocks).strip()
+
+    def convertFile(self, input=None, output=None, encoding=None):
+        """
+        Convert a markdown file and write the HTML to a file or stdout, block
+        by block.
+
+        Takes the same arguments as `Markdown.convertFile`.  Input which
+        can't be read twice, like stdin, is copied to a temporary file
+        first.  Documents which have to be converted as a whole (see the
+        class docstring) are read into memory.
+
+        """
+        encoding = encoding or "utf-8"
+        self.reset()
+        self._reset_stash()
+        self._restore_patterns()
+        if self._document_level():
+            return super().convertFile(input, output, encoding)
+
+        # Open the input as a seekable binary file.
+        if isinstance(input, str):
+            input_file = open(input, 'rb')
+        elif input and input.seekable():
+            input_file = input
+        else:
+            input_file = tempfile.TemporaryFile()
+            if input:
+                shutil.copyfileobj(input, input_file)
+            else:
+                for text in iter(lambda: sys.stdin.read(65536), ''):
+                    input_file.write(text.encode(encoding) if isinstance(text, str) else text)
+        start = input_file.tell() if input_file is input else 0
+
+        definitions = self.preprocessors['incremental_definitions']
+        try:
+            # Collect the definitions.
+            input_file.seek(start)
+            for block in self._stream_blocks(self._read_lines(input_file, encoding)):
+                self._reset_stash()
+                self._preprocess(block)
+
+            # Open the output.
+            if isinstance(output, str):
+                output_file = codecs.open(output, "w", encoding=encoding, errors="xmlcharrefreplace")
+            elif output:
+                output_file = codecs.getwriter(encoding)(output, errors="xmlcharrefreplace")
+            else:
+                output_file = codecs.getwriter(encoding)(sys.stdout.buffer, errors="xmlcharrefreplace")
+
+            # Convert and write the blocks, joined like by `convert`.
+            definitions.references = dict(self.references)
+            html = None
+            input_file.seek(start)
+            for block in self._stream_blocks(self._read_lines(input_file, encoding)):
+                self._reset_stash()
+                self.postprocessors['incremental_output'].text = ''
+                super().convert(block)
+                text = self.postprocessors['incremental_output'].text
+                if text.strip():
+                    if html is None:
+                        text = text.lstrip()
+                    else:
+                        output_file.write(html + '\n')
+                    html = text
+            if html is not None:
+                output_file.write(html.rstrip())
+            if isinstance(output, str):
+                output_file.close()
+            elif not output:
+                output_file.flush()
+        finally:
+            definitions.references = None
+            if input_file is not input:
+                input_file.close()
+        return self
+
+    def _read_lines(self, input_file, encoding):
+        """
+        Yield the lines of the file, split at newlines only, without the
+        carriage returns of CRLF line ends.
+        """
+        reader = codecs.getreader(encoding)(input_file)
+        line = ''
+        first = True
+        for text in iter(lambda: reader.read(65536), ''):
+            lines = (line + text).split('\n')
+            if first:
+                # remove the byte-order mark
+                lines[0] = lines[0].lstrip('\ufeff')
+                first = False
+            line = lines.pop()
+            for line_ in lines:
+                yield line_[:-1] if line_.endswith('\r') else line_
+        yield line
+
+    def _stream_blocks(self, lines):
+        """
+        Yield the text of the blocks made from the iterable of `lines`, as
+        `convert` would split them.  Lines are split in batches of at least
+        `stream_lines`; the blocks at the end of a batch may be joined to
+        what follows, so they are held back for the next one.
+        """
+        normalize = self.preprocessors['normalize_whitespace']
+        buffered = []
+        size = max(self.stream_lines, 1)
+        for line in lines:
+            buffered.append(line)
+            if len(buffered) < size:
+                continue
+            # Normalizing again is harmless.  The two blank lines it adds at
+            # the end are dropped.
+            normalized = normalize.run(buffered)[:-2]
+            fences = self._find_fences(normalized)
+            blocks = self._split(normalized, fences)
+            cut = blocks[-2][0] if len(blocks) > 1 else 0
+            # A fence that isn't closed yet may be closed by what follows.
+            opener = self._open_fence(normalized, fences)
+            if opener is not None:
+                cut = min(cut, max(first for first, last in blocks if first <= opener))
+            for first, last in blocks:
+                if first >= cut:
+                    break
+                yield '\n'.join(normalized[first:last + 1])
+            buffered = normalized[cut:]
+            # Don't split the same lines over and over.
+            size = max(self.stream_lines, 2 * len(buffered))
+        normalized = normalize.run(buffered)
+        fences = self._find_fences(normalized)
+        for first, last in self._split(normalized, fences):
+            yield '\n'.join(normalized[first:last + 1])
+
+    def _open_fence(self, lines, fences):
+        """ Return the first line which may open a fence that isn't closed. """
+        if 'fenced_code_block' not in self.preprocessors:
+            return None
+        fenced = set()
+        for start, end in fences:
+            fenced.update(range(start, end + 1))
+        for n, line in enumerate(lines):
+            if n not in fenced and FENCE_START_RE.match(line):
+                return n
+        return None
+
+    def _preprocess(self, source):
+        """
+        Run the preprocessors over the whole document to collect the
+        definitions.  Returns the normalized lines and the (start, end) line
+        ranges of the fenced code blocks.
+        """
+        base = set(name for name, item, priority in self._base_patterns)
+        lines = source.split('\n')
+        normalized = fences = None
+        for prep in self.preprocessors:
+            if prep is self.preprocessors['normalize_whitespace']:
+                normalized = lines = prep.run(lines)
+                fences = self._find_fences(lines)
+            elif 'fenced_code_block' in self.preprocessors and \
+                    prep is self.preprocessors['fenced_code_block']:
+                # The code isn't needed, only the placeholders.
+                lines = lines[:]
+                for start, end in reversed(fences):
+                    lines[start:end + 1] = ['', self.htmlStash.store(''), '']
+            elif prep is not self.preprocessors['incremental_definitions']:
+                lines = prep.run(lines)
+        self.preprocessors['incremental_definitions'].patterns = [
+            item for item in self._registry_items(self.inlinePatterns) if item[0] not in base
+        ]
+        return normalized, fences
+
+    def _find_fences(self, lines):
+        """ Return the (start, end) line ranges of the fenced code blocks. """
+        if 'fenced_code_block' not in self.preprocessors:
+            return []
+        text = '\n'.join(lines)
+        starts = [0]
+        for line in lines:
+            starts.append(starts[-1] + len(line) + 1)
+        fences = []
+        line = 0
+        for m in self.preprocessors['fenced_code_block'].FENCED_BLOCK_RE.finditer(text):
+            while starts[line + 1] <= m.start():
+                line += 1
+            start = line
+            while starts[line + 1] <= m.end():
+                line += 1
+            fences.append((start, line))
+        return fences
+
+    def _split(self, lines, fences):
+        """
+        Split the normalized lines into the blocks that are converted on
+        their own and return their (first, last) line ranges.  A blank line
+        only separates two blocks if neither depends on the other.
+        """
+        # The paragraphs between blank lines, as [first, last] line ranges.
+        # A fenced code block is a paragraph of its own, like the
+        # placeholder that replaces it.
+        fenced = {}
+        for start, end in fences:
+            fenced[start] = end
+        paragraphs = []
+        i = 0
+        while i < len(lines):
+            if i in fenced:
+                paragraphs.append([i, fenced[i], True])
+                i = fenced[i] + 1
+            elif lines[i]:
+                if paragraphs and not paragraphs[-1][2] and paragraphs[-1][1] == i - 1:
+                    paragraphs[-1][1] = i
+                else:
+                    paragraphs.append([i, i, False])
+                i += 1
+            else:
+                i += 1
+        in_html = self._html_blocks(lines, fences)
+
+        # Whether each paragraph is joined to the one before it.
+        joined = [False] * len(paragraphs)
+        for n in range(1, len(paragraphs)):
+            start, end, is_fence = paragraphs[n]
+            prev_end = paragraphs[n - 1][1]
+            text = '\n'.join(lines[start:end + 1])
+            if prev_end in in_html or prev_end + 1 == start or \
+                    (start - prev_end > 2 and lines[prev_end].startswith(' ')):
+                joined[n] = True
+            elif not lines[prev_end].strip():
+                # A whitespace only first line (the only one normalizing
+                # leaves) converts to nothing alone, but to an empty code
+                # block before what follows.
+                joined[n] = True
+            elif not is_fence and (CONTINUATION_RE.match(text) or DEFINITION_RE.search(text)):
+                joined[n] = True
+            if not is_fence and DEFINITION_RE.match(text):
+                # The previous block holds the terms, and the definition may
+                # be added to a list before it.
+                k = n - 1
+                while joined[k]:
+                    k -= 1
+                joined[k] = k > 0
+
+        blocks = []
+        first = 0
+        for n in range(1, len(paragraphs)):
+            if not joined[n]:
+                blocks.append((paragraphs[first][0], paragraphs[n - 1][1]))
+                first = n
+        if paragraphs:
+            blocks.append((paragraphs[first][0], paragraphs[-1][1]))
+        return blocks
+
+    def _html_blocks(self, lines, fences):
+        """
+        Return the lines at which a raw HTML block continues past the end of
+        a paragraph, the way `HtmlBlockPreprocessor` groups the paragraphs of
+        the text that the fenced code blocks have been replaced in.
+        """
+        # The preprocessed lines, and the normalized line each comes from.
+        view = []
+        origin = []
+        i = 0
+        for start, end in fences + [(len(lines), len(lines))]:
+            view.extend(lines[i:start])
+            origin.extend(range(i, start))
+            if start < len(lines):
+                view.extend(['', 'x', ''])
+                origin.extend([None, end, None])
+            i = end + 1
+
+        html = self.preprocessors['html_block']
+        continued = set()
+        in_tag = False
+        items = []
+        left_tag = ''
+        left_index = 0
+        line = 0
+        for block in '\n'.join(view).rsplit('\n\n'):
+            count = block.count('\n') + 1
+            last = max([n for n in origin[line:line + count] if n is not None and lines[n]] or [None])
+            line += count + 1
+            # Raw HTML keeps the newline at the end of a paragraph followed
+            # by more than one blank line, and text after a closing tag, even
+            # a lone newline, is a block of its own: the paragraph isn't
+            # split from what follows then.
+            split = not (in_tag and block.endswith('\n'))
+            queue = [block]
+            while queue:
+                block = queue.pop()
+                for _ in range(2):
+                    if block.startswith('\n'):
+                        block = block[1:]
+                if not in_tag:
+                    if not (block.startswith('<') and len(block.strip()) > 1):
+                        continue
+                    if block.endswith('\n'):
+                        split = False
+                    if block[1:4] == '!--':
+                        left_tag, left_index = '--', 2
+                    else:
+                        left_tag, left_index = html._get_left_tag(block)[:2]
+                    right_tag, data_index = html._get_right_tag(left_tag, left_index, block)
+                    block_level = self.is_block_level(left_tag) or left_tag == '--'
+                    if data_index < len(block) and block_level:
+                        queue.append(block[data_index:])
+                        split = False
+                        block = block[:data_index]
+                    if not (block_level or block[1] in ['!', '?', '@', '%']) or \
+                            html._is_oneliner(left_tag):
+                        continue
+                    if block.rstrip().endswith('>') and html._equal_tags(left_tag, right_tag):
+                        continue
+                    if not html._equal_tags(left_tag, right_tag) and block_level:
+                        items = [block.strip()]
+                        in_tag = True
+                else:
+                    items.append(block)
+                    right_tag, data_index = html._get_right_tag(left_tag, left_index, ''.join(items))
+                    data_index -= sum(len(item) for item in items[:-1])
+                    if html._equal_tags(left_tag, right_tag):
+                        if data_index < len(block):
+                            queue.append(block[data_index:])
+                            split = False
+                        in_tag = False
+                        items = []
+            if (in_tag or not split) and last is not None:
+                continued.add(last)
+        return continued
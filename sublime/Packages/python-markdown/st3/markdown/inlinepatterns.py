@@ -69,6 +69,10 @@ try:  # pragma: no cover
     from html import entities
 except ImportError:  # pragma: no cover
     import htmlentitydefs as entities
+try:  # pragma: no cover
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse
 
 
 def build_inlinepatterns(md, **kwargs):
@@ -179,6 +183,71 @@ def dequote(string):
         return string
 
 
+def _first_chars(items):
+    """
+    Return the characters the parsed regular expression `items` can start
+    with, or None if any character might do, and whether it can match the
+    empty string.
+    """
+    chars = set()
+    for op, av in items:
+        if op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            # Zero-width: the match starts with what follows.
+            continue
+        if op is sre_parse.LITERAL:
+            chars.add(chr(av))
+            return chars, False
+        if op is sre_parse.IN:
+            for iop, iav in av:
+                if iop is sre_parse.LITERAL:
+                    chars.add(chr(iav))
+                elif iop is sre_parse.RANGE and iav[1] - iav[0] < 256:
+                    chars.update(chr(c) for c in range(iav[0], iav[1] + 1))
+                else:
+                    return None, False
+            return chars, False
+        if op is sre_parse.SUBPATTERN:
+            if len(av) == 4 and av[1] & re.IGNORECASE:
+                return None, False
+            first, empty = _first_chars(av[-1])
+        elif op is sre_parse.BRANCH:
+            first, empty = set(), False
+            for branch in av[1]:
+                branch_first, branch_empty = _first_chars(branch)
+                if branch_first is None:
+                    return None, False
+                first |= branch_first
+                empty = empty or branch_empty
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            first, empty = _first_chars(av[2])
+            empty = empty or av[0] == 0
+        else:
+            return None, False
+        if first is None:
+            return None, False
+        chars |= first
+        if not empty:
+            return chars, False
+    return chars, True
+
+
+def first_chars(compiled_re):
+    """
+    Return a frozenset of the characters a match of the compiled regular
+    expression can start with, or None if it might start with any character
+    or match the empty string.
+    """
+    if compiled_re.flags & re.IGNORECASE:
+        return None
+    try:
+        chars, empty = _first_chars(sre_parse.parse(compiled_re.pattern, compiled_re.flags))
+    except Exception:  # pragma: no cover
+        return None
+    if chars is None or empty:
+        return None
+    return frozenset(chars)
+
+
 class EmStrongItem(namedtuple('EmStrongItem', ['pattern', 'builder', 'tags'])):
     """Emphasis/strong pattern item."""
 
@@ -219,6 +288,18 @@ class Pattern:  # pragma: no cover
         """ Return a compiled regular expression. """
         return self.compiled_re
 
+    def getFirstChars(self):
+        """
+        Return the characters a match can start with, or None if a match can
+        start anywhere.  Used to skip the pattern for text which doesn't
+        contain any of them.
+        """
+        compiled_re = self.getCompiledRegExp()
+        cached = getattr(self, '_first_chars', None)
+        if cached is None or cached[0] is not compiled_re:
+            cached = self._first_chars = (compiled_re, first_chars(compiled_re))
+        return cached[1]
+
     def handleMatch(self, m):
         """Return a ElementTree element from the given match.
 
@@ -25,6 +25,10 @@ from . import util
 from . import inlinepatterns
 
 
+# The characters of inline placeholders.
+PLACEHOLDER_CHARS = frozenset(util.INLINE_PLACEHOLDER % '0123456789')
+
+
 def build_treeprocessors(md, **kwargs):
     """ Build the default treeprocessors for Markdown. """
     treeprocessors = util.Registry()
@@ -64,8 +68,15 @@ class Treeprocessor(util.Processor):
 class InlineProcessor(Treeprocessor):
     """
     A Treeprocessor that traverses a tree, applying inline patterns.
+
+    Patterns are applied in order of priority, each to the whole text.  With
+    `first_char_dispatch` set, a pattern is skipped for text which contains
+    none of the characters a match of it can start with (see
+    `inlinepatterns.Pattern.getFirstChars`).  The result is the same.
     """
 
+    first_char_dispatch = True
+
     def __init__(self, md):
         self.__placeholder_prefix = util.INLINE_PLACEHOLDER_PREFIX
         self.__placeholder_suffix = util.ETX
@@ -127,12 +138,20 @@ class InlineProcessor(Treeprocessor):
         """
         if not isinstance(data, util.AtomicString):
             startIndex = 0
-            while patternIndex < len(self.inlinePatterns):
+            # The characters in data, and in the placeholders added to it.
+            chars = set(data)
+            while patternIndex < len(self.__patterns):
+                pattern, first = self.__patterns[patternIndex]
+                if first is not None and chars.isdisjoint(first):
+                    patternIndex += 1
+                    continue
                 data, matched, startIndex = self.__applyPattern(
-                    self.inlinePatterns[patternIndex], data, patternIndex, startIndex
+                    pattern, data, patternIndex, startIndex
                 )
                 if not matched:
                     patternIndex += 1
+                else:
+                    chars.update(PLACEHOLDER_CHARS)
         return data
 
     def __processElementText(self, node, subnode, isText=True):
@@ -346,6 +365,12 @@ class InlineProcessor(Treeprocessor):
         """
         self.stashed_nodes = {}
 
+        # The patterns with the characters their matches can start with.
+        self.__patterns = [
+            (pattern, pattern.getFirstChars() if self.first_char_dispatch else None)
+            for pattern in self.inlinePatterns
+        ]
+
         # Ensure a valid parent list, but copy passed in lists
         # to ensure we don't have the user accidentally change it on us.
         tree_parents = [] if ancestors is None else ancestors[:]